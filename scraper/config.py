@@ -3,16 +3,45 @@ Configuration settings for Google Maps Scraper
 """
 
 # Scraping Settings
-NUM_WINDOWS = 3  # Number of parallel browser windows (set to 1 if rate limited)
+NUM_WINDOWS = 3  # Number of parallel browser windows (add proxies to scale beyond one IP's budget)
 HEADLESS = False  # Set to False to see browser windows
 PAGE_LOAD_TIMEOUT = 30  # seconds
 IMPLICIT_WAIT = 10  # seconds
 
+# Browser Profile Settings
+USE_PERSISTENT_PROFILES = True  # Reuse on-disk Chrome profiles (HTTP cache, cookies, consent) across runs
+PROFILES_DIR = "profiles"  # One user-data-dir per window slot is kept here
+MAX_PROFILE_SIZE_MB = 500  # Prune a profile's caches when it grows beyond this
+DISK_CACHE_SIZE_MB = 300  # Chrome HTTP cache limit per profile
+PROFILE_LOCK_STALE_HOURS = 12  # Locks older than this are treated as left over from a crashed run (keep above the longest run)
+
 # Anti-bot Settings
 MIN_DELAY = 2  # Minimum delay between actions (seconds)
 MAX_DELAY = 5  # Maximum delay between actions (seconds)
 SCROLL_PAUSE_TIME = 2  # Time to wait after scrolling
 
+# Proxy Settings
+PROXIES = []  # e.g. ["http://10.0.0.1:3128", "socks5://10.0.0.2:1080"]; empty = direct connection
+PROXY_LIST_FILE = None  # Optional file with one proxy URL per line
+REQUESTS_PER_MINUTE_PER_EXIT = 12  # Page loads allowed per exit IP per minute
+PROXY_MAX_FAILURES = 3  # Consecutive captchas/errors before an exit is quarantined
+PROXY_QUARANTINE_SECONDS = 600  # Quarantine length before an exit is re-probed
+PROXY_PROBE_URL = "https://www.google.com/maps"
+PROXY_PROBE_TIMEOUT = 10  # seconds
+
+# Resilience Settings
+MAX_RETRIES_PER_RUN = 100  # Retries of failed place pages shared by all windows of a run
+MAX_ATTEMPTS_PER_URL = 3  # Attempts per place page before it is given up
+RETRY_BACKOFF_BASE = 5  # Delay before the first retry (seconds), doubled on every further attempt
+RETRY_BACKOFF_MAX = 120  # Upper bound of the retry delay (seconds)
+CIRCUIT_BREAKER_THRESHOLD = 3  # Consecutive throttled pages before a window is paused and recycled
+CIRCUIT_BREAKER_PAUSE = 180  # Pause of a tripped window (seconds)
+
+# Post-processing Settings
+DEDUPE_NAME_SIMILARITY = 0.9  # Minimum name similarity (0-1) for fuzzy duplicates
+DEDUPE_ADDRESS_SIMILARITY = 0.8  # Minimum address similarity (0-1) for fuzzy duplicates
+DEDUPE_WINDOW = 5  # Neighbours (by sorted name / address) each record is compared with
+
 # Output Settings
 OUTPUT_DIR = "output"
 EXCEL_FILE_PREFIX = "google_maps_results"
@@ -21,3 +50,11 @@ EXCEL_FILE_PREFIX = "google_maps_results"
 GOOGLE_MAPS_URL = "https://www.google.com/maps"
 SEARCH_QUERY_TEMPLATE = "{category} {city} {district}"
 MAX_RESULTS_PER_SEARCH = 500  # Maximum number of results to scrape per search
+EXTRACTION_BACKEND = "dom"  # "network" parses the results feed's JSON responses; disabled until maps_parser.LAYOUT_VERIFIED
+
+# Review Settings
+SCRAPE_REVIEWS = False  # Open the reviews pane on each place page and harvest reviews
+MAX_REVIEWS_PER_PLACE = 200  # Stop harvesting a place after this many reviews
+REVIEWS_SINCE = None  # Stop at reviews older than this date ("YYYY-MM-DD", None = no cutoff)
+REVIEW_SCROLL_PAUSE_TIME = 1.5  # Time to wait after scrolling the reviews pane
+REVIEWS_FILE_PREFIX = "google_maps_reviews"
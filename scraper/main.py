@@ -7,11 +7,21 @@ import os
 from datetime import datetime
 import logging
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from tqdm import tqdm
 from scraper_modules.browser_manager import BrowserManager
 from scraper_modules.google_maps import GoogleMapsScraper
+from scraper_modules.reviews import ReviewScraper, JsonlReviewSink
+from scraper_modules.proxy_pool import ProxyPool
+from scraper_modules.maps_parser import LAYOUT_VERIFIED
+from scraper_modules.postprocess import postprocess_businesses
+from scraper_modules.resilience import FailureTracker, DRIVER_DEAD
 from scraper_modules.utils import build_search_query
-from config import NUM_WINDOWS, OUTPUT_DIR, EXCEL_FILE_PREFIX
+from config import (
+    NUM_WINDOWS, OUTPUT_DIR, EXCEL_FILE_PREFIX,
+    SCRAPE_REVIEWS, MAX_REVIEWS_PER_PLACE, REVIEWS_SINCE, REVIEWS_FILE_PREFIX,
+    USE_PERSISTENT_PROFILES, PROXY_LIST_FILE, EXTRACTION_BACKEND
+)
 
 logging.basicConfig(
     level=logging.INFO,
@@ -19,13 +29,38 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+EXPORT_COLUMNS = [
+    'name', 'category', 'rating', 'reviews_count',
+    'phone', 'address', 'city', 'district', 'postcode',
+    'website', 'google_maps_url', 'place_id', 'google_place_id',
+    'latitude', 'longitude',
+    'search_category', 'search_city', 'search_district',
+    'duplicates'
+]
+
 
 class GoogleMapsScraperApp:
     """Main application class for Google Maps scraping"""
 
-    def __init__(self, num_windows=NUM_WINDOWS):
+    def __init__(self, num_windows=NUM_WINDOWS, scrape_reviews=SCRAPE_REVIEWS,
+                 max_reviews=MAX_REVIEWS_PER_PLACE, reviews_since=REVIEWS_SINCE,
+                 use_profiles=USE_PERSISTENT_PROFILES, proxy_file=PROXY_LIST_FILE,
+                 backend=EXTRACTION_BACKEND):
+        if backend == 'network' and not LAYOUT_VERIFIED:
+            logger.warning(
+                "The network backend is disabled until maps_parser is verified against recorded "
+                "Maps responses (tests/record_fixtures.py); using the DOM backend"
+            )
+            backend = 'dom'
         self.num_windows = num_windows
+        self.backend = backend
+        self.proxy_file = proxy_file
+        self.use_profiles = use_profiles
         self.results = []
+        self.scrape_reviews = scrape_reviews
+        self.max_reviews = max_reviews
+        self.reviews_since = datetime.strptime(reviews_since, "%Y-%m-%d") if reviews_since else None
+        self.reviews_path = None
 
     def scrape_single_query(self, category, city, district=None):
         """
@@ -43,35 +78,175 @@ class GoogleMapsScraperApp:
         logger.info(f"Starting scrape with query: '{search_query}'")
 
         all_results = []
+        proxy_pool = ProxyPool(list_file=self.proxy_file)
+        if self.num_windows > len(proxy_pool):
+            logger.warning(
+                f"{self.num_windows} windows share {len(proxy_pool)} exit(s); "
+                f"throughput is capped by each exit's rate budget"
+            )
+
+        failure_tracker = FailureTracker()
+        review_sink = JsonlReviewSink(self._reviews_filepath()) if self.scrape_reviews else None
+        browser_manager = BrowserManager(
+            num_windows=self.num_windows,
+            use_profiles=self.use_profiles,
+            proxy_pool=proxy_pool
+        )
 
         try:
             # Start browser(s)
-            with BrowserManager(num_windows=1) as drivers:  # Start with 1 window for safety
-                driver = drivers[0]
-                scraper = GoogleMapsScraper(driver)
-
-                # Perform scraping
-                results = scraper.scrape(search_query, city, district)
-                all_results.extend(results)
+            with browser_manager as drivers:
+                scrapers = [
+                    self._build_scraper(browser_manager, i, failure_tracker, review_sink)
+                    for i in range(len(drivers))
+                ]
+
+                if self.backend == 'network':
+                    # The feed's responses already hold every record; the
+                    # windows only visit place pages when reviews are wanted
+                    all_results = scrapers[0].find_feed_businesses(search_query, city, district)
+                    if review_sink and all_results:
+                        self._run_on_windows(
+                            scrapers, all_results,
+                            lambda scraper, chunk: scraper.harvest_reviews(chunk)
+                        )
+                else:
+                    # The first window searches; place pages are split across all windows
+                    business_links = scrapers[0].find_business_links(search_query)
+                    if not business_links:
+                        logger.warning("No business links found")
+                    else:
+                        for results in self._run_on_windows(
+                            scrapers, business_links,
+                            lambda scraper, chunk: scraper.extract_businesses(chunk, search_query, city, district)
+                        ):
+                            all_results.extend(results)
+                        all_results.extend(
+                            self._take_over_dead_windows(scrapers, failure_tracker, search_query, city, district)
+                        )
+
+                for i, scraper in enumerate(scrapers):
+                    if scraper.blocked:
+                        browser_manager.mark_profile_flagged(i)
+                self._log_query_metrics(scrapers, browser_manager.is_warm(0), len(all_results))
+
+                if review_sink:
+                    for scraper in scrapers:
+                        summary = scraper.review_scraper.summary()
+                        logger.info(
+                            f"Window {scraper.window_index + 1} reviews: {summary['reviews']} harvested "
+                            f"in {summary['seconds']}s ({summary['reviews_per_second']} reviews/s)"
+                        )
+                    logger.info(f"Reviews saved to: {self.reviews_path}")
 
         except Exception as e:
             logger.error(f"Error during scraping: {e}")
             raise
 
+        finally:
+            if review_sink:
+                review_sink.close()
+            proxy_pool.log_summary()
+            failure_tracker.log_summary()
+
         return all_results
 
-    def export_to_excel(self, data, filename=None):
+    def _run_on_windows(self, scrapers, items, task):
+        """Split items round-robin across the windows and run task(scraper, chunk) in parallel"""
+        chunks = [items[i::len(scrapers)] for i in range(len(scrapers))]
+        with ThreadPoolExecutor(max_workers=len(scrapers)) as executor:
+            futures = [
+                executor.submit(task, scraper, chunk)
+                for scraper, chunk in zip(scrapers, chunks) if chunk
+            ]
+            return [future.result() for future in futures]
+
+    def _take_over_dead_windows(self, scrapers, failure_tracker, query, city, district):
+        """Hand the links left over by windows whose browser died to the live windows"""
+        leftovers = []
+        for scraper in scrapers:
+            leftovers.extend(scraper.unprocessed)
+            scraper.unprocessed = []
+        if not leftovers:
+            return []
+
+        live = [scraper for scraper in scrapers if not scraper.dead]
+        if not live:
+            logger.error(f"All windows died, {len(leftovers)} business links left unprocessed")
+            for url in leftovers:
+                failure_tracker.record_given_up(url, DRIVER_DEAD)
+            return []
+
+        logger.info(f"{len(live)} live window(s) take over {len(leftovers)} links of dead windows")
+        results = []
+        for chunk_results in self._run_on_windows(
+            live, leftovers,
+            lambda scraper, chunk: scraper.extract_businesses(chunk, query, city, district)
+        ):
+            results.extend(chunk_results)
+        # Windows that died during the take-over
+        for scraper in live:
+            for url in scraper.unprocessed:
+                failure_tracker.record_given_up(url, DRIVER_DEAD)
+        return results
+
+    def _build_scraper(self, browser_manager, window_index, failure_tracker, review_sink=None):
+        """Create the scraper (and optional review scraper) for one window"""
+        driver = browser_manager.drivers[window_index]
+        review_scraper = None
+        if review_sink:
+            review_scraper = ReviewScraper(
+                driver, review_sink,
+                max_reviews=self.max_reviews,
+                since=self.reviews_since
+            )
+        return GoogleMapsScraper(
+            driver,
+            review_scraper=review_scraper,
+            browser_manager=browser_manager,
+            window_index=window_index,
+            backend=self.backend,
+            failure_tracker=failure_tracker
+        )
+
+    def _log_query_metrics(self, scrapers, warm, num_results):
+        """Log time-to-first-result and network transfer for a query"""
+        if not self.use_profiles:
+            profile = 'no profile'
+        else:
+            profile = 'warm profile' if warm else 'cold profile'
+        metrics = dict(scrapers[0].metrics)
+        for scraper in scrapers[1:]:
+            for key in ('bytes_received', 'requests', 'cached_requests'):
+                metrics[key] += scraper.metrics[key]
+        megabytes = metrics['bytes_received'] / (1024 * 1024)
+        per_place = megabytes / num_results if num_results else 0
+        logger.info(
+            f"Query metrics ({profile}): time-to-first-result {metrics['time_to_first_result']}s, "
+            f"{megabytes:.1f} MB over {metrics['requests']} requests "
+            f"({metrics['cached_requests']} from cache), {per_place:.2f} MB per place"
+        )
+
+    def _reviews_filepath(self):
+        """Build the JSON Lines path that harvested reviews are streamed to"""
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self.reviews_path = os.path.join(OUTPUT_DIR, f"{REVIEWS_FILE_PREFIX}_{timestamp}.jsonl")
+        return self.reviews_path
+
+    def export_to_excel(self, data, filename=None, postprocess=True):
         """
         Export scraped data to Excel file
 
         Args:
-            data: List of business dictionaries
+            data: List of business dictionaries (or a DataFrame)
             filename: Optional custom filename
+            postprocess: Normalize phones/locations and merge duplicates first
 
         Returns:
             Path to the exported Excel file
         """
-        if not data:
+        if data is None or len(data) == 0:
             logger.warning("No data to export")
             return None
 
@@ -86,18 +261,11 @@ class GoogleMapsScraperApp:
         filepath = os.path.join(OUTPUT_DIR, filename)
 
         # Create DataFrame
-        df = pd.DataFrame(data)
+        df = postprocess_businesses(data) if postprocess else pd.DataFrame(data)
 
         # Reorder columns for better readability
-        column_order = [
-            'name', 'category', 'rating', 'reviews_count',
-            'phone', 'address', 'city', 'district',
-            'website', 'google_maps_url',
-            'search_category', 'search_city', 'search_district'
-        ]
-
         # Only include columns that exist in the data
-        existing_columns = [col for col in column_order if col in df.columns]
+        existing_columns = [col for col in EXPORT_COLUMNS if col in df.columns]
         df = df[existing_columns]
 
         # Export to Excel
@@ -179,6 +347,12 @@ Examples:
   # Scrape nail salons in Ankara with custom output filename
   python main.py --category "tırnak salonu" --city "Ankara" --output "ankara_salons.xlsx"
 
+  # 4 windows spread over the proxies listed in proxies.txt
+  python main.py --category "güzellik salonu" --city "Istanbul" --windows 4 --proxy-file proxies.txt
+
+  # Also harvest up to 100 reviews per place, newer than 2024-01-01
+  python main.py --category "diş kliniği" --city "Izmir" --reviews --max-reviews 100 --reviews-since 2024-01-01
+
 Categories:
   - güzellik salonu (beauty salon)
   - tırnak salonu (nail salon)
@@ -222,10 +396,51 @@ Categories:
         help='Number of browser windows (default: 1, use 3-4 for parallel scraping)'
     )
 
+    parser.add_argument(
+        '--proxy-file',
+        type=str,
+        default=PROXY_LIST_FILE,
+        help='File with one proxy URL per line; each window is assigned its own exit'
+    )
+
+    parser.add_argument(
+        '--reviews',
+        action='store_true',
+        default=SCRAPE_REVIEWS,
+        help='Harvest reviews from each place page into a JSON Lines file'
+    )
+
+    parser.add_argument(
+        '--max-reviews',
+        type=int,
+        default=MAX_REVIEWS_PER_PLACE,
+        help=f'Maximum reviews to harvest per place (default: {MAX_REVIEWS_PER_PLACE})'
+    )
+
+    parser.add_argument(
+        '--reviews-since',
+        type=str,
+        default=REVIEWS_SINCE,
+        help='Stop harvesting a place at reviews older than this date (YYYY-MM-DD)'
+    )
+
+    parser.add_argument(
+        '--no-profile',
+        action='store_true',
+        help='Start with a fresh, empty Chrome profile instead of the persistent profile pool'
+    )
+
     args = parser.parse_args()
 
     # Create and run scraper
-    app = GoogleMapsScraperApp(num_windows=args.windows)
+    app = GoogleMapsScraperApp(
+        num_windows=args.windows,
+        scrape_reviews=args.reviews,
+        max_reviews=args.max_reviews,
+        reviews_since=args.reviews_since,
+        use_profiles=USE_PERSISTENT_PROFILES and not args.no_profile,
+        proxy_file=args.proxy_file
+    )
     app.run(
         category=args.category,
         city=args.city,
@@ -0,0 +1,102 @@
+"""
+Merge scraped datasets
+Normalizes and deduplicates businesses from multiple sweeps into one file
+"""
+import pandas as pd
+import os
+import logging
+import argparse
+from scraper_modules.postprocess import postprocess_businesses
+from main import GoogleMapsScraperApp, EXPORT_COLUMNS
+from config import OUTPUT_DIR
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def read_dataset(path):
+    """Read an Excel, CSV or Parquet export into a DataFrame"""
+    extension = os.path.splitext(path)[1].lower()
+    # Phones and postcodes must stay text to keep their leading zeros
+    text_columns = {'phone': str, 'postcode': str}
+    if extension == '.csv':
+        return pd.read_csv(path, dtype=text_columns)
+    if extension == '.parquet':
+        return pd.read_parquet(path)
+    return pd.read_excel(path, dtype=text_columns)
+
+
+def merge_datasets(paths, output):
+    """
+    Merge datasets, run the normalization/dedupe stage and write the result
+
+    Args:
+        paths: Input file paths (.xlsx, .csv or .parquet)
+        output: Output filename; .csv and .parquet are written as-is, anything
+            else goes to Excel in the output directory
+
+    Returns:
+        Path to the merged file
+    """
+    frames = []
+    for path in paths:
+        df = read_dataset(path)
+        logger.info(f"Loaded {len(df)} rows from {path}")
+        frames.append(df)
+
+    merged = postprocess_businesses(pd.concat(frames, ignore_index=True))
+
+    extension = os.path.splitext(output)[1].lower()
+    if extension not in ('.csv', '.parquet'):
+        # Excel export reuses the scraper's formatting
+        return GoogleMapsScraperApp().export_to_excel(merged, output, postprocess=False)
+
+    columns = [col for col in EXPORT_COLUMNS if col in merged.columns]
+    merged = merged[columns]
+    if extension == '.csv':
+        merged.to_csv(output, index=False)
+    else:
+        merged.to_parquet(output, index=False)
+
+    logger.info(f"Merged data written to: {output}")
+    logger.info(f"Total records: {len(merged)}")
+    return output
+
+
+def main():
+    """CLI entry point"""
+    parser = argparse.ArgumentParser(
+        description='Merge, normalize and deduplicate scraped Google Maps datasets',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=f"""
+Examples:
+  # Merge all Excel exports in {OUTPUT_DIR}/ into one deduplicated Excel file
+  python merge.py {OUTPUT_DIR}/google_maps_results_*.xlsx --output merged.xlsx
+
+  # Large merges: write CSV instead of Excel (no row limit)
+  python merge.py sweeps/*.csv --output merged.csv
+        """
+    )
+
+    parser.add_argument(
+        'inputs',
+        nargs='+',
+        help='Input files (.xlsx, .csv or .parquet)'
+    )
+
+    parser.add_argument(
+        '--output',
+        type=str,
+        default='merged.xlsx',
+        help='Output filename (.xlsx, .csv or .parquet) (default: merged.xlsx)'
+    )
+
+    args = parser.parse_args()
+    merge_datasets(args.inputs, args.output)
+
+
+if __name__ == "__main__":
+    main()
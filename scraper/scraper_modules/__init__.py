@@ -3,6 +3,13 @@ Scraper modules package
 """
 from .browser_manager import BrowserManager
 from .google_maps import GoogleMapsScraper
+from .reviews import ReviewScraper, JsonlReviewSink
+from .profile_pool import ProfilePool
+from .proxy_pool import ProxyPool, ProxyExit
+from .network_capture import NetworkCapture
+from .maps_parser import parse_response, parse_place
+from .resilience import FailureTracker, CircuitBreaker, ExtractionError, classify_failure
+from .postprocess import postprocess_businesses, normalize_phones, resolve_locations, deduplicate_businesses
 from .utils import (
     random_delay,
     get_random_user_agent,
@@ -10,17 +17,37 @@ from .utils import (
     build_search_query,
     clean_phone_number,
     clean_rating,
-    clean_review_count
+    clean_review_count,
+    parse_relative_date,
+    split_address_location
 )
 
 __all__ = [
     'BrowserManager',
     'GoogleMapsScraper',
+    'ReviewScraper',
+    'JsonlReviewSink',
+    'ProfilePool',
+    'ProxyPool',
+    'ProxyExit',
+    'NetworkCapture',
+    'parse_response',
+    'parse_place',
+    'FailureTracker',
+    'CircuitBreaker',
+    'ExtractionError',
+    'classify_failure',
+    'postprocess_businesses',
+    'normalize_phones',
+    'resolve_locations',
+    'deduplicate_businesses',
     'random_delay',
     'get_random_user_agent',
     'human_like_scroll',
     'build_search_query',
     'clean_phone_number',
     'clean_rating',
-    'clean_review_count'
+    'clean_review_count',
+    'parse_relative_date',
+    'split_address_location'
 ]
@@ -6,7 +6,11 @@ from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
 from webdriver_manager.chrome import ChromeDriverManager
 from scraper_modules.utils import get_random_user_agent
-from config import HEADLESS, PAGE_LOAD_TIMEOUT, IMPLICIT_WAIT
+from scraper_modules.profile_pool import ProfilePool
+from config import (
+    HEADLESS, PAGE_LOAD_TIMEOUT, IMPLICIT_WAIT,
+    USE_PERSISTENT_PROFILES, DISK_CACHE_SIZE_MB
+)
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -16,9 +20,13 @@ logger = logging.getLogger(__name__)
 class BrowserManager:
     """Manages multiple browser windows for parallel scraping"""
 
-    def __init__(self, num_windows=1):
+    def __init__(self, num_windows=1, use_profiles=USE_PERSISTENT_PROFILES, proxy_pool=None):
         self.num_windows = num_windows
         self.drivers = []
+        self.profile_pool = ProfilePool() if use_profiles else None
+        self.profiles = {}  # window_index -> {'path': ..., 'warm': ...}
+        self.proxy_pool = proxy_pool
+        self.proxy_exits = {}  # window_index -> ProxyExit
 
     def create_driver(self, window_index=0):
         """Create a single Chrome driver with anti-detection settings"""
@@ -34,10 +42,32 @@ class BrowserManager:
         chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
         chrome_options.add_experimental_option('useAutomationExtension', False)
 
-        # Random user agent
-        user_agent = get_random_user_agent()
+        # Persistent profile (keeps HTTP cache, cookies and consent between runs)
+        profile_path = None
+        if self.profile_pool:
+            profile_path, warm = self.profile_pool.acquire(window_index)
+            self.profiles[window_index] = {'path': profile_path, 'warm': warm}
+            chrome_options.add_argument(f"--user-data-dir={profile_path}")
+            chrome_options.add_argument(f"--disk-cache-size={DISK_CACHE_SIZE_MB * 1024 * 1024}")
+
+        # Random user agent (pinned per profile when profiles are used)
+        if profile_path:
+            user_agent = self.profile_pool.user_agent(profile_path)
+        else:
+            user_agent = get_random_user_agent()
         chrome_options.add_argument(f'user-agent={user_agent}')
 
+        # Egress assigned by the proxy pool
+        if self.proxy_pool:
+            proxy_exit = self.proxy_pool.assign()
+            self.proxy_exits[window_index] = proxy_exit
+            if proxy_exit.url:
+                chrome_options.add_argument(f"--proxy-server={proxy_exit.url}")
+            logger.info(f"Browser window {window_index + 1} uses exit {proxy_exit.name}")
+
+        # Performance log for measuring network bytes per query
+        chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+
         # Window size
         chrome_options.add_argument("--window-size=1920,1080")
         chrome_options.add_argument("--start-maximized")
@@ -49,8 +79,13 @@ class BrowserManager:
             chrome_options.add_argument(f"--window-position={x_position},{y_position}")
 
         # Create driver
-        service = Service(ChromeDriverManager().install())
-        driver = webdriver.Chrome(service=service, options=chrome_options)
+        try:
+            service = Service(ChromeDriverManager().install())
+            driver = webdriver.Chrome(service=service, options=chrome_options)
+        except Exception:
+            self.release_profile(window_index)
+            self.release_proxy_exit(window_index)
+            raise
 
         # Set timeouts
         driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
@@ -81,6 +116,52 @@ class BrowserManager:
         logger.info(f"All {self.num_windows} browser window(s) started successfully")
         return self.drivers
 
+    def recycle_driver(self, window_index):
+        """
+        Replace a window's driver with a fresh one, picking up a new proxy exit
+
+        Returns:
+            The new driver
+        """
+        logger.info(f"Recycling browser window {window_index + 1}...")
+        try:
+            self.drivers[window_index].quit()
+        except Exception as e:
+            logger.error(f"Error closing browser window {window_index + 1}: {e}")
+        self.release_profile(window_index)
+        self.release_proxy_exit(window_index)
+
+        driver = self.create_driver(window_index=window_index)
+        self.drivers[window_index] = driver
+        return driver
+
+    def proxy_exit(self, window_index):
+        """Proxy exit assigned to a window (None without a proxy pool)"""
+        return self.proxy_exits.get(window_index)
+
+    def release_proxy_exit(self, window_index):
+        """Return a window's exit to the proxy pool"""
+        proxy_exit = self.proxy_exits.pop(window_index, None)
+        if proxy_exit and self.proxy_pool:
+            self.proxy_pool.release(proxy_exit)
+
+    def release_profile(self, window_index):
+        """Unlock the profile used by a window"""
+        profile = self.profiles.pop(window_index, None)
+        if profile and self.profile_pool:
+            self.profile_pool.release(profile['path'])
+
+    def mark_profile_flagged(self, window_index):
+        """Flag a window's profile (e.g. after a captcha) so it is rotated next run"""
+        profile = self.profiles.get(window_index)
+        if profile and self.profile_pool:
+            self.profile_pool.mark_flagged(profile['path'])
+
+    def is_warm(self, window_index):
+        """Whether a window started with a warm (previously used) profile"""
+        profile = self.profiles.get(window_index)
+        return bool(profile and profile['warm'])
+
     def cleanup(self):
         """Close all browser windows"""
         logger.info("Closing all browser windows...")
@@ -91,6 +172,12 @@ class BrowserManager:
             except Exception as e:
                 logger.error(f"Error closing browser window {i + 1}: {e}")
 
+        # Profiles are released only after Chrome has exited and flushed them to disk
+        for window_index in list(self.profiles):
+            self.release_profile(window_index)
+        for window_index in list(self.proxy_exits):
+            self.release_proxy_exit(window_index)
+
         self.drivers = []
         logger.info("All browser windows closed")
 
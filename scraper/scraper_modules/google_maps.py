@@ -10,40 +10,241 @@ import logging
 import time
 from scraper_modules.utils import (
     random_delay, human_like_scroll, clean_phone_number,
-    clean_rating, clean_review_count
+    clean_rating, clean_review_count, split_address_location
+)
+from scraper_modules.network_capture import NetworkCapture
+from scraper_modules.maps_parser import parse_response
+from scraper_modules.resilience import (
+    ExtractionError, FailureTracker, CircuitBreaker, classify_failure, backoff_delay,
+    TIMEOUT, THROTTLED, DRIVER_DEAD, PARSE_MISS
+)
+from config import (
+    GOOGLE_MAPS_URL, SCROLL_PAUSE_TIME, MAX_RESULTS_PER_SEARCH, PAGE_LOAD_TIMEOUT, EXTRACTION_BACKEND
 )
-from config import GOOGLE_MAPS_URL, SCROLL_PAUSE_TIME, MAX_RESULTS_PER_SEARCH
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Whether the place panel has rendered: the page finished loading and the
+# panel (role=main, labelled with the place name) or its detail rows exist
+PLACE_PANEL_RENDERED_SCRIPT = """
+return document.readyState === 'complete' && !!(
+    document.querySelector('div[role="main"][aria-label]') ||
+    document.querySelector('[data-item-id]')
+);
+"""
+
 
 class GoogleMapsScraper:
     """Scraper for extracting business data from Google Maps"""
 
-    def __init__(self, driver):
+    def __init__(self, driver, review_scraper=None, browser_manager=None, window_index=0,
+                 backend=EXTRACTION_BACKEND, failure_tracker=None):
+        """
+        Args:
+            driver: Selenium driver
+            review_scraper: Optional ReviewScraper; when set, reviews are
+                harvested from every place page after its details are read
+            browser_manager: Optional BrowserManager owning the driver; used to
+                pace requests per proxy exit and to recycle the window
+            window_index: Index of the driver's window in the browser manager
+            backend: "dom" reads every place page; "network" builds the records
+                from the JSON responses behind the results feed
+            failure_tracker: Optional FailureTracker shared by all windows of a
+                run (failure counts and retry budget); a private one otherwise
+        """
+        self.driver = driver
+        self.wait = WebDriverWait(driver, 10)
+        self.backend = backend
+        self.network = NetworkCapture(driver, capture_responses=backend == 'network')
+        self.review_scraper = review_scraper
+        if review_scraper:
+            # Long harvests drain the performance log as they scroll
+            review_scraper.poll = self.collect_network_stats
+        self.browser_manager = browser_manager
+        self.window_index = window_index
+        self.blocked = False
+        self.dead = False  # Browser died and could not be replaced
+        self.unprocessed = []  # Links left over when the window died
+        self.failure_tracker = failure_tracker or FailureTracker()
+        self.circuit_breaker = CircuitBreaker()
+        self.metrics = {
+            'time_to_first_result': None,
+            'bytes_received': 0,
+            'requests': 0,
+            'cached_requests': 0
+        }
+
+    @property
+    def proxy_exit(self):
+        """Proxy exit the current driver goes out through, if any"""
+        if self.browser_manager is None:
+            return None
+        return self.browser_manager.proxy_exit(self.window_index)
+
+    def set_driver(self, driver):
+        """Switch to a new driver (e.g. after the window was recycled)"""
         self.driver = driver
         self.wait = WebDriverWait(driver, 10)
+        self.network = NetworkCapture(driver, capture_responses=self.backend == 'network')
+        self.blocked = False
+        if self.review_scraper:
+            self.review_scraper.set_driver(driver)
+
+    def navigate(self, url):
+        """
+        Load a URL within the rate budget of the window's proxy exit
+        and report the outcome to the proxy pool
+
+        Returns:
+            False if Google answered with a captcha, True otherwise
+        """
+        proxy_exit = self.proxy_exit
+        proxy_pool = self.browser_manager.proxy_pool if proxy_exit else None
+        if proxy_exit:
+            proxy_exit.wait_for_slot()
+
+        start_time = time.time()
+        try:
+            self.driver.get(url)
+        except Exception as e:
+            kind = classify_failure(e)
+            # A crashed browser says nothing about the exit
+            if proxy_pool and kind != DRIVER_DEAD:
+                proxy_pool.report_failure(proxy_exit, kind)
+            raise
+
+        if self.is_blocked():
+            self.blocked = True
+            logger.error(f"Google is serving a captcha for {url}")
+            if proxy_pool:
+                proxy_pool.report_failure(proxy_exit, 'captcha')
+            return False
+
+        if proxy_pool:
+            proxy_pool.report_success(proxy_exit, time.time() - start_time)
+        return True
+
+    def _ensure_healthy_exit(self):
+        """Recycle the window onto a new exit once its current exit is quarantined"""
+        proxy_exit = self.proxy_exit
+        if proxy_exit and proxy_exit.quarantined:
+            logger.warning(f"Exit {proxy_exit.name} quarantined, recycling window {self.window_index + 1}")
+            self.recycle()
+
+    def recycle(self):
+        """
+        Replace the window's browser (and exit) with a fresh one
+
+        Returns:
+            False if no new browser could be started; the window is then dead
+        """
+        if self.browser_manager is None:
+            return False
+        if self.blocked:
+            # The profile is released on recycling, flag it while it is still ours
+            self.browser_manager.mark_profile_flagged(self.window_index)
+        try:
+            self.set_driver(self.browser_manager.recycle_driver(self.window_index))
+        except Exception as e:
+            logger.error(f"Could not restart browser window {self.window_index + 1}: {e}")
+            self.dead = True
+            return False
+        self.circuit_breaker.reset()
+        return True
+
+    def handle_failure(self, kind):
+        """
+        React to a failed place page: replace a dead browser, and pause and
+        recycle the window once the circuit breaker opens on repeated throttling
+        """
+        if kind == DRIVER_DEAD:
+            if not self.recycle():
+                self.dead = True
+            return
+
+        if self.circuit_breaker.record(kind):
+            self.failure_tracker.record_circuit_trip()
+            logger.warning(
+                f"Window {self.window_index + 1} throttled {self.circuit_breaker.consecutive_throttles} "
+                f"times in a row, pausing {self.circuit_breaker.pause_seconds}s before recycling"
+            )
+            time.sleep(self.circuit_breaker.pause_seconds)
+            if not self.recycle():
+                self.circuit_breaker.reset()
+
+    def collect_network_stats(self):
+        """Add network transfer since the last call to the query metrics"""
+        stats = self.network.poll()
+        for key, value in stats.items():
+            self.metrics[key] += value
+
+    def accept_consent(self):
+        """Accept Google's cookie consent interstitial if it is shown"""
+        if 'consent.google' not in self.driver.current_url:
+            return False
+        try:
+            accept_button = self.driver.find_element(
+                By.XPATH,
+                "//button[.//span[contains(text(), 'Tümünü kabul et') or contains(text(), 'Accept all')]]"
+            )
+            accept_button.click()
+            random_delay(1, 2)
+            logger.info("Accepted consent interstitial")
+            return True
+        except NoSuchElementException:
+            logger.warning("Consent page shown but accept button not found")
+            return False
+
+    def is_blocked(self):
+        """Check whether Google is serving a captcha / unusual traffic page"""
+        if '/sorry/' in self.driver.current_url:
+            return True
+        # Checked via script so the implicit wait does not delay every page load
+        return self.driver.execute_script("return !!document.querySelector(\"iframe[src*='recaptcha']\");")
 
     def search(self, query):
         """Perform a search on Google Maps"""
         logger.info(f"Searching for: {query}")
 
         # Navigate to Google Maps
-        self.driver.get(GOOGLE_MAPS_URL)
-        random_delay(2, 4)
+        start_time = time.time()
+        if not self.navigate(GOOGLE_MAPS_URL):
+            return False
+        self.accept_consent()
 
         try:
             # Find search box and enter query
             search_box = self.wait.until(
                 EC.presence_of_element_located((By.ID, "searchboxinput"))
             )
+            page_load_seconds = time.time() - start_time
+            random_delay(2, 4)
+
             search_box.clear()
             search_box.send_keys(query)
             random_delay(1, 2)
             search_box.send_keys(Keys.RETURN)
 
-            # Wait for results to load
+            # Time to first result excludes the deliberate human-like delays above
+            results_start = time.time()
+            try:
+                WebDriverWait(self.driver, PAGE_LOAD_TIMEOUT).until(
+                    EC.presence_of_element_located((By.CSS_SELECTOR, 'div[role="feed"] a, h1.DUwDvf'))
+                )
+                self.metrics['time_to_first_result'] = round(
+                    page_load_seconds + time.time() - results_start, 2
+                )
+            except TimeoutException:
+                if self.is_blocked():
+                    self.blocked = True
+                    logger.error("Google is serving a captcha, search blocked")
+                    return False
+                logger.warning("No results appeared before timeout")
+
+            self.collect_network_stats()
+
+            # Wait for results to settle
             random_delay(3, 5)
 
             logger.info("Search completed, waiting for results...")
@@ -84,6 +285,8 @@ class GoogleMapsScraper:
 
                 time.sleep(SCROLL_PAUSE_TIME)
                 scroll_count += 1
+                # Fetch captured feed pages while Chrome still buffers them
+                self.collect_network_stats()
 
                 # Check if new results loaded
                 new_results = len(self.driver.find_elements(
@@ -145,120 +348,328 @@ class GoogleMapsScraper:
             return []
 
     def extract_business_details(self, url):
-        """Extract detailed information from a business page"""
+        """
+        Extract detailed information from a business page
+
+        Raises:
+            ExtractionError: If Google throttled the page, the place panel did not
+                render in time, or the rendered panel shows no business name
+            TimeoutException, WebDriverException: If the page or the browser failed;
+                see resilience.classify_failure
+        """
+        if not self.navigate(url):
+            raise ExtractionError(THROTTLED, f"Captcha served for {url}")
+        random_delay(2, 4)
+
+        business_data = {
+            'name': None,
+            'category': None,
+            'address': None,
+            'phone': None,
+            'website': None,
+            'rating': None,
+            'reviews_count': 0,
+            'google_maps_url': url,
+            'city': None,
+            'district': None
+        }
+
+        # Extract business name
         try:
-            self.driver.get(url)
-            random_delay(2, 4)
+            name_element = self.wait.until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, "h1.DUwDvf"))
+            )
+            business_data['name'] = name_element.text
+        except TimeoutException:
+            if self.is_blocked():
+                self.blocked = True
+                raise ExtractionError(THROTTLED, f"Captcha served for {url}")
+            # The SPA returns from driver.get before the panel renders; only a
+            # rendered panel without a name is a parse miss
+            if not self.driver.execute_script(PLACE_PANEL_RENDERED_SCRIPT):
+                raise ExtractionError(TIMEOUT, f"Place panel of {url} did not render in time")
+            raise ExtractionError(PARSE_MISS, f"No business name on {url}")
+
+        # Extract category
+        try:
+            category_element = self.driver.find_element(
+                By.CSS_SELECTOR,
+                "button[jsaction*='category']"
+            )
+            business_data['category'] = category_element.text
+        except:
+            pass
 
-            business_data = {
-                'name': None,
-                'category': None,
-                'address': None,
-                'phone': None,
-                'website': None,
-                'rating': None,
-                'reviews_count': 0,
-                'google_maps_url': url,
-                'city': None,
-                'district': None
-            }
-
-            # Extract business name
-            try:
-                name_element = self.wait.until(
-                    EC.presence_of_element_located((By.CSS_SELECTOR, "h1.DUwDvf"))
-                )
-                business_data['name'] = name_element.text
-            except:
-                logger.warning(f"Could not extract name from {url}")
+        # Extract rating
+        try:
+            rating_element = self.driver.find_element(
+                By.CSS_SELECTOR,
+                "div.F7nice > span[aria-hidden='true']"
+            )
+            business_data['rating'] = clean_rating(rating_element.text)
+        except:
+            pass
 
-            # Extract category
-            try:
-                category_element = self.driver.find_element(
-                    By.CSS_SELECTOR,
-                    "button[jsaction*='category']"
-                )
-                business_data['category'] = category_element.text
-            except:
-                pass
+        # Extract review count
+        try:
+            review_element = self.driver.find_element(
+                By.CSS_SELECTOR,
+                "div.F7nice > span > span > span[aria-label*='yorum'], div.F7nice > span > span > span[aria-label*='review']"
+            )
+            business_data['reviews_count'] = clean_review_count(review_element.get_attribute('aria-label'))
+        except:
+            pass
 
-            # Extract rating
-            try:
-                rating_element = self.driver.find_element(
-                    By.CSS_SELECTOR,
-                    "div.F7nice > span[aria-hidden='true']"
+        # Extract address
+        try:
+            address_button = self.driver.find_element(
+                By.CSS_SELECTOR,
+                "button[data-item-id='address']"
+            )
+            address_text = address_button.get_attribute('aria-label')
+            if address_text:
+                # Remove "Adres: " or "Address: " prefix
+                business_data['address'] = address_text.replace('Adres: ', '').replace('Address: ', '')
+        except:
+            pass
+
+        # Extract phone
+        try:
+            phone_button = self.driver.find_element(
+                By.CSS_SELECTOR,
+                "button[data-item-id*='phone']"
+            )
+            phone_text = phone_button.get_attribute('aria-label')
+            if phone_text:
+                # Remove "Telefon: " or "Phone: " prefix
+                business_data['phone'] = clean_phone_number(
+                    phone_text.replace('Telefon: ', '').replace('Phone: ', '')
                 )
-                business_data['rating'] = clean_rating(rating_element.text)
-            except:
-                pass
+        except:
+            pass
 
-            # Extract review count
-            try:
-                review_element = self.driver.find_element(
-                    By.CSS_SELECTOR,
-                    "div.F7nice > span > span > span[aria-label*='yorum'], div.F7nice > span > span > span[aria-label*='review']"
-                )
-                business_data['reviews_count'] = clean_review_count(review_element.get_attribute('aria-label'))
-            except:
-                pass
+        # Extract website
+        try:
+            website_link = self.driver.find_element(
+                By.CSS_SELECTOR,
+                "a[data-item-id='authority']"
+            )
+            business_data['website'] = website_link.get_attribute('href')
+        except:
+            pass
 
-            # Extract address
-            try:
-                address_button = self.driver.find_element(
-                    By.CSS_SELECTOR,
-                    "button[data-item-id='address']"
-                )
-                address_text = address_button.get_attribute('aria-label')
-                if address_text:
-                    # Remove "Adres: " or "Address: " prefix
-                    business_data['address'] = address_text.replace('Adres: ', '').replace('Address: ', '')
-            except:
-                pass
-
-            # Extract phone
-            try:
-                phone_button = self.driver.find_element(
-                    By.CSS_SELECTOR,
-                    "button[data-item-id*='phone']"
+        # Extract city and district from the "<postcode> District/City" address tail
+        business_data['district'], business_data['city'] = split_address_location(
+            business_data['address']
+        )
+
+        self.collect_network_stats()
+        logger.info(f"Extracted: {business_data['name']}")
+        return business_data
+
+    def find_business_links(self, query):
+        """Search, scroll the results feed and return the business links"""
+        if not self.search(query):
+            return []
+
+        # Scroll to load all results
+        self.scroll_results()
+
+        # Extract all business links
+        return self.extract_business_links()
+
+    def find_feed_businesses(self, query, city, district=None):
+        """
+        Search, scroll the results feed and parse the businesses from the
+        captured feed responses, without visiting any place page
+
+        Args:
+            query: Search query
+            city: City name
+            district: Optional district name
+
+        Returns:
+            List of business dictionaries
+        """
+        if not self.search(query):
+            return []
+        self.scroll_results()
+        self.collect_network_stats()
+
+        businesses = {}
+        for response in self.network.take_responses():
+            for business_data in parse_response(response['body']):
+                # Scroll pages overlap; keep the first record of each place
+                businesses.setdefault(business_data['place_id'], business_data)
+
+        results = list(businesses.values())[:MAX_RESULTS_PER_SEARCH]
+        for business_data in results:
+            business_data['search_category'] = query
+            business_data['search_city'] = city
+            business_data['search_district'] = district
+
+        logger.info(f"Parsed {len(results)} businesses from the results feed")
+        return results
+
+    def review_failed(self, url, error):
+        """
+        Classify a failed review harvest and react to it like a failed page
+
+        Counted apart from lost place records, since the business itself is
+        already extracted. Not retried: a partial harvest is already in the
+        review file.
+        """
+        kind = classify_failure(error)
+        self.failure_tracker.record_failure(kind)
+        self.failure_tracker.record_review_failure(url, kind)
+        logger.warning(f"Window {self.window_index + 1}: {kind} harvesting reviews from {url}: {error}")
+        self.handle_failure(kind)
+
+    def harvest_place_reviews(self, url, name):
+        """
+        Harvest the reviews of the place page that is currently open
+
+        Returns:
+            True if the harvest finished, False if it failed (see review_failed)
+        """
+        try:
+            self.review_scraper.harvest(url, name)
+        except Exception as e:
+            self.review_failed(url, e)
+            return False
+        return True
+
+    def harvest_reviews(self, businesses):
+        """
+        Visit the place pages of already extracted businesses for their reviews
+
+        Used with the network backend, where place pages are not otherwise
+        visited. Failures are classified like place extraction failures and
+        drive the same recycling and circuit breaker; they are not retried,
+        since a partial harvest is already in the review file.
+        """
+        for i, business_data in enumerate(businesses, 1):
+            if self.dead:
+                logger.error(
+                    f"Window {self.window_index + 1} is dead, "
+                    f"skipping reviews of {len(businesses) - i + 1} businesses"
                 )
-                phone_text = phone_button.get_attribute('aria-label')
-                if phone_text:
-                    # Remove "Telefon: " or "Phone: " prefix
-                    business_data['phone'] = clean_phone_number(
-                        phone_text.replace('Telefon: ', '').replace('Phone: ', '')
-                    )
-            except:
-                pass
+                for remaining in businesses[i - 1:]:
+                    self.failure_tracker.record_review_failure(remaining['google_maps_url'], DRIVER_DEAD)
+                return
 
-            # Extract website
+            self._ensure_healthy_exit()
+            logger.info(f"Window {self.window_index + 1}: reviews of business {i}/{len(businesses)}")
+            url = business_data['google_maps_url']
             try:
-                website_link = self.driver.find_element(
-                    By.CSS_SELECTOR,
-                    "a[data-item-id='authority']"
-                )
-                business_data['website'] = website_link.get_attribute('href')
-            except:
-                pass
-
-            # Try to extract city and district from address
-            if business_data['address']:
-                # Turkish address format typically: Street, District/City
-                parts = business_data['address'].split(',')
-                if len(parts) >= 2:
-                    # Last part usually contains city
-                    last_part = parts[-1].strip()
-                    business_data['city'] = last_part
-                    # Second to last might be district
-                    if len(parts) >= 3:
-                        business_data['district'] = parts[-2].strip()
-
-            logger.info(f"Extracted: {business_data['name']}")
-            return business_data
+                if not self.navigate(url):
+                    raise ExtractionError(THROTTLED, f"Captcha served for {url}")
+            except Exception as e:
+                self.review_failed(url, e)
+            else:
+                if self.harvest_place_reviews(url, business_data['name']):
+                    self.circuit_breaker.reset()
+
+            if not self.dead:
+                self.collect_network_stats()
+                self.network.take_responses()  # The record already holds the place data
+            random_delay()
+
+    def try_extract(self, url, attempts, retry_queue):
+        """
+        Extract one place page, classifying a failure and queueing the URL
+        for a retry while the run's retry budget allows
+
+        Args:
+            url: Google Maps place URL
+            attempts: Number of this attempt (1 = first)
+            retry_queue: List that (url, attempts) pairs to retry are appended to
 
+        Returns:
+            Business dictionary, or None if the attempt failed
+        """
+        try:
+            business_data = self.extract_business_details(url)
         except Exception as e:
-            logger.error(f"Error extracting business details from {url}: {e}")
+            kind = classify_failure(e)
+            self.failure_tracker.record_failure(kind)
+            logger.warning(f"Window {self.window_index + 1}: {kind} on attempt {attempts} for {url}: {e}")
+            self.handle_failure(kind)
+
+            if self.dead:
+                self.unprocessed.append(url)
+            elif self.failure_tracker.try_retry(attempts):
+                retry_queue.append((url, attempts))
+            else:
+                self.failure_tracker.record_given_up(url, kind)
             return None
 
+        if attempts > 1:
+            self.failure_tracker.record_recovered()
+
+        # Optional reviews stage; a failed harvest keeps the record but, like
+        # a failed page, feeds the circuit breaker and may recycle the window
+        if self.review_scraper and not self.harvest_place_reviews(url, business_data['name']):
+            return business_data
+        self.circuit_breaker.reset()
+        return business_data
+
+    def extract_businesses(self, links, query, city, district=None):
+        """
+        Extract details from each business link
+
+        Failed pages are retried with backoff after the first pass over the
+        links. If the window's browser dies for good, the remaining links are
+        kept in self.unprocessed so another window can take them over.
+
+        Args:
+            links: Google Maps place URLs
+            query: Search query the links came from
+            city: City name
+            district: Optional district name
+
+        Returns:
+            List of business dictionaries
+        """
+        results = []
+        retry_queue = []
+
+        def add_result(business_data):
+            # Add search parameters
+            business_data['search_category'] = query
+            business_data['search_city'] = city
+            business_data['search_district'] = district
+            results.append(business_data)
+
+        for i, link in enumerate(links, 1):
+            if self.dead:
+                self.unprocessed.append(link)
+                continue
+            self._ensure_healthy_exit()
+            logger.info(f"Window {self.window_index + 1}: processing business {i}/{len(links)}")
+
+            business_data = self.try_extract(link, 1, retry_queue)
+            if business_data:
+                add_result(business_data)
+
+            random_delay()  # Anti-bot delay between businesses
+
+        while retry_queue:
+            url, attempts = retry_queue.pop(0)
+            if self.dead:
+                self.unprocessed.append(url)
+                continue
+            delay = backoff_delay(attempts)
+            logger.info(f"Window {self.window_index + 1}: retrying {url} in {delay:.0f}s")
+            time.sleep(delay)
+            self._ensure_healthy_exit()
+
+            business_data = self.try_extract(url, attempts + 1, retry_queue)
+            if business_data:
+                add_result(business_data)
+
+        return results
+
     def scrape(self, query, city, district=None):
         """
         Main scraping method
@@ -273,35 +684,21 @@ class GoogleMapsScraper:
         """
         logger.info(f"Starting scrape for: {query} in {city}" + (f", {district}" if district else ""))
 
-        # Perform search
-        if not self.search(query):
-            return []
-
-        # Scroll to load all results
-        self.scroll_results()
+        if self.backend == 'network':
+            results = self.find_feed_businesses(query, city, district)
+            if self.review_scraper:
+                self.harvest_reviews(results)
+            logger.info(f"Scraping completed. Found {len(results)} businesses")
+            return results
 
-        # Extract all business links
-        business_links = self.extract_business_links()
+        business_links = self.find_business_links(query)
 
         if not business_links:
             logger.warning("No business links found")
             return []
 
         # Extract details from each business
-        results = []
-        for i, link in enumerate(business_links, 1):
-            logger.info(f"Processing business {i}/{len(business_links)}")
-
-            business_data = self.extract_business_details(link)
-
-            if business_data:
-                # Add search parameters
-                business_data['search_category'] = query
-                business_data['search_city'] = city
-                business_data['search_district'] = district
-                results.append(business_data)
-
-            random_delay()  # Anti-bot delay between businesses
+        results = self.extract_businesses(business_links, query, city, district)
 
         logger.info(f"Scraping completed. Found {len(results)} businesses")
         return results
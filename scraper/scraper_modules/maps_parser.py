@@ -0,0 +1,202 @@
+"""
+Parser for the JSON payloads behind Google Maps' results feed and place pages
+
+Maps answers its search (/search?tbm=map) and place preview
+(/maps/preview/place) requests with nested, position-indexed JSON arrays.
+Each place is one such array; the indexes below are where its fields live.
+They are independent of the CSS classes of the rendered page.
+"""
+import re
+import json
+import logging
+from urllib.parse import quote_plus, urlparse, parse_qs
+from scraper_modules.utils import clean_phone_number, split_address_location
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+XSSI_PREFIX = ")]}'"
+TRAILER = '/*""*/'
+
+# Feature id shared with place URLs ("!1s0x14cab9...:0x2b1f..."), see postprocess.PLACE_ID_PATTERN
+FEATURE_ID_PATTERN = re.compile(r'^0x[0-9a-f]+:0x[0-9a-f]+$')
+
+# Field positions inside a place array
+NAME = (11,)
+FEATURE_ID = (10,)
+GOOGLE_PLACE_ID = (78,)
+CATEGORIES = (13,)
+ADDRESS = (39,)
+NAME_AND_ADDRESS = (18,)
+ADDRESS_LINES = (2,)
+WEBSITE = (7, 0)
+PHONE = (178, 0, 0)
+RATING = (4, 7)
+REVIEWS_COUNT = (4, 8)
+LATITUDE = (9, 2)
+LONGITUDE = (9, 3)
+
+# The positions above are only checked against synthetic fixtures so far. The
+# network backend stays disabled until they pass against responses recorded
+# with tests/record_fixtures.py; set this once they do.
+LAYOUT_VERIFIED = False
+
+PLACE_URL_TEMPLATE = "https://www.google.com/maps/place/{name}/data=!4m2!3m1!1s{feature_id}"
+
+
+def load_payload(body):
+    """
+    Decode a Maps response body into Python objects
+
+    Handles the XSSI guard (")]}'") and the search endpoint's envelope,
+    where the actual array is a JSON string under the "d" key.
+
+    Args:
+        body: Response body text
+
+    Returns:
+        Decoded payload, or None if the body is not JSON
+    """
+    text = body.strip()
+    if text.endswith(TRAILER):
+        text = text[:-len(TRAILER)]
+    if text.startswith(XSSI_PREFIX):
+        text = text[len(XSSI_PREFIX):]
+    try:
+        payload = json.loads(text)
+    except ValueError:
+        return None
+
+    if isinstance(payload, dict) and isinstance(payload.get('d'), str):
+        return load_payload(payload['d'])
+    return payload
+
+
+def _get(node, path):
+    """Follow a path of list indexes, returning None where the payload has no value"""
+    for index in path:
+        if not isinstance(node, list) or index >= len(node):
+            return None
+        node = node[index]
+    return node
+
+
+def is_place(node):
+    """Whether a node is a place array (has a name and a feature id)"""
+    feature_id = _get(node, FEATURE_ID)
+    return (
+        isinstance(_get(node, NAME), str)
+        and isinstance(feature_id, str)
+        and FEATURE_ID_PATTERN.match(feature_id) is not None
+    )
+
+
+def find_places(node):
+    """
+    Yield every place array in a payload
+
+    The payload is walked instead of read at fixed offsets, so results are
+    found in search responses (one place per feed entry) and in place
+    responses alike. Places nested inside a place ("people also search
+    for") are skipped.
+    """
+    if not isinstance(node, list):
+        return
+    if is_place(node):
+        yield node
+        return
+    for child in node:
+        yield from find_places(child)
+
+
+def _clean_website(url):
+    """Unwrap Google's /url?q= redirect around website links"""
+    if not isinstance(url, str):
+        return None
+    if url.startswith('/url?'):
+        return parse_qs(urlparse(url).query).get('q', [None])[0]
+    return url
+
+
+def _address(place, name):
+    """Full address, falling back to the "Name, address" line and the address lines"""
+    address = _get(place, ADDRESS)
+    if isinstance(address, str) and address:
+        return address
+
+    name_and_address = _get(place, NAME_AND_ADDRESS)
+    if isinstance(name_and_address, str) and name_and_address.startswith(f"{name}, "):
+        return name_and_address[len(name) + 2:]
+
+    lines = _get(place, ADDRESS_LINES)
+    if isinstance(lines, list) and lines:
+        return ', '.join(line for line in lines if isinstance(line, str))
+    return None
+
+
+def parse_place(place):
+    """
+    Turn a place array into a business record
+
+    Args:
+        place: Place array as found by find_places()
+
+    Returns:
+        Business dictionary with the same fields as the DOM extraction plus
+        latitude, longitude and place ids
+    """
+    name = _get(place, NAME)
+    feature_id = _get(place, FEATURE_ID)
+
+    categories = _get(place, CATEGORIES)
+    category = categories[0] if isinstance(categories, list) and categories else None
+
+    phone = _get(place, PHONE)
+    rating = _get(place, RATING)
+    reviews_count = _get(place, REVIEWS_COUNT)
+    latitude = _get(place, LATITUDE)
+    longitude = _get(place, LONGITUDE)
+    google_place_id = _get(place, GOOGLE_PLACE_ID)
+    address = _address(place, name)
+    district, city = split_address_location(address)
+
+    return {
+        'name': name,
+        'category': category,
+        'address': address,
+        'phone': clean_phone_number(phone) if isinstance(phone, str) else None,
+        'website': _clean_website(_get(place, WEBSITE)),
+        'rating': float(rating) if isinstance(rating, (int, float)) else None,
+        'reviews_count': int(reviews_count) if isinstance(reviews_count, (int, float)) else 0,
+        'google_maps_url': PLACE_URL_TEMPLATE.format(name=quote_plus(name), feature_id=feature_id),
+        'city': city,
+        'district': district,
+        'latitude': latitude if isinstance(latitude, (int, float)) else None,
+        'longitude': longitude if isinstance(longitude, (int, float)) else None,
+        'place_id': feature_id,
+        'google_place_id': google_place_id if isinstance(google_place_id, str) else None
+    }
+
+
+def parse_response(body):
+    """
+    Parse all places in a captured response body
+
+    Args:
+        body: Body of a /search?tbm=map or /maps/preview/place response
+
+    Returns:
+        List of business dictionaries (empty if the body could not be parsed)
+    """
+    payload = load_payload(body)
+    if payload is None:
+        logger.warning("Response body is not a Maps JSON payload")
+        return []
+
+    businesses = []
+    for place in find_places(payload):
+        try:
+            businesses.append(parse_place(place))
+        except Exception as e:
+            logger.warning(f"Could not parse place {_get(place, NAME)}: {e}")
+    return businesses
@@ -0,0 +1,91 @@
+"""
+Network capture over Chrome's performance log (CDP Network events)
+"""
+import json
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Maps XHRs carrying structured place data: the results feed (search and its
+# scroll pagination) and the place preview loaded when a result is opened
+CAPTURE_URL_PATTERNS = ('/search?tbm=map', '/maps/preview/place')
+
+# Keep captured bodies in Chrome long enough to fetch them after a scroll
+MAX_TOTAL_BUFFER_SIZE = 100 * 1024 * 1024
+MAX_RESOURCE_BUFFER_SIZE = 20 * 1024 * 1024
+
+
+class NetworkCapture:
+    """
+    Reads the CDP Network events Chrome writes to the performance log
+
+    Every poll sums up transfer statistics; with capture_responses enabled,
+    bodies of Maps data responses are fetched via Network.getResponseBody
+    and kept until take_responses() is called. Requires the
+    'goog:loggingPrefs' performance capability set by BrowserManager.
+    """
+
+    def __init__(self, driver, capture_responses=False):
+        self.driver = driver
+        self.capture_responses = capture_responses
+        self._pending = {}  # requestId -> url of matching responses not finished yet
+        self._responses = []
+
+        if capture_responses:
+            try:
+                self.driver.execute_cdp_cmd('Network.enable', {
+                    'maxTotalBufferSize': MAX_TOTAL_BUFFER_SIZE,
+                    'maxResourceBufferSize': MAX_RESOURCE_BUFFER_SIZE
+                })
+            except Exception as e:
+                logger.warning(f"Could not enlarge network buffers: {e}")
+
+    def poll(self):
+        """
+        Drain the performance log
+
+        Returns:
+            Dict with bytes_received, requests and cached_requests since the last poll
+        """
+        stats = {'bytes_received': 0, 'requests': 0, 'cached_requests': 0}
+        try:
+            entries = self.driver.get_log('performance')
+        except Exception:
+            return stats
+
+        for entry in entries:
+            try:
+                message = json.loads(entry['message'])['message']
+            except (KeyError, ValueError):
+                continue
+            method = message.get('method')
+            params = message.get('params', {})
+
+            if method == 'Network.loadingFinished':
+                stats['bytes_received'] += int(params.get('encodedDataLength', 0))
+                stats['requests'] += 1
+                url = self._pending.pop(params.get('requestId'), None)
+                if url:
+                    self._fetch_body(params['requestId'], url)
+            elif method == 'Network.requestServedFromCache':
+                stats['cached_requests'] += 1
+            elif method == 'Network.responseReceived' and self.capture_responses:
+                url = params.get('response', {}).get('url', '')
+                if any(pattern in url for pattern in CAPTURE_URL_PATTERNS):
+                    self._pending[params.get('requestId')] = url
+
+        return stats
+
+    def _fetch_body(self, request_id, url):
+        try:
+            result = self.driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': request_id})
+        except Exception as e:
+            logger.warning(f"Could not read response body of {url}: {e}")
+            return
+        self._responses.append({'url': url, 'body': result.get('body', '')})
+
+    def take_responses(self):
+        """Return and clear the captured responses"""
+        responses, self._responses = self._responses, []
+        return responses
@@ -0,0 +1,431 @@
+"""
+Bulk normalization and deduplication of scraped business records
+"""
+import os
+import time
+import logging
+from difflib import SequenceMatcher
+from functools import lru_cache
+import numpy as np
+import pandas as pd
+from scraper_modules.utils import ADDRESS_LOCATION_PATTERN
+from config import DEDUPE_NAME_SIMILARITY, DEDUPE_ADDRESS_SIMILARITY, DEDUPE_WINDOW
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+GAZETTEER_FILE = os.path.join(os.path.dirname(__file__), 'data', 'tr_gazetteer.csv')
+
+# Turkish letters folded to ASCII so "İstanbul", "Istanbul" and "istanbul" share a key
+TURKISH_FOLD = str.maketrans({
+    'İ': 'i', 'I': 'i', 'ı': 'i', 'Ş': 's', 'ş': 's', 'Ğ': 'g', 'ğ': 'g',
+    'Ü': 'u', 'ü': 'u', 'Ö': 'o', 'ö': 'o', 'Ç': 'c', 'ç': 'c',
+    'Â': 'a', 'â': 'a', 'Î': 'i', 'î': 'i', 'Û': 'u', 'û': 'u'
+})
+
+# Feature ID embedded in place URLs, e.g. ".../data=!4m7!3m6!1s0x14cab9...:0x5c1f...!8m2..."
+PLACE_ID_PATTERN = r'!1s(0x[0-9a-f]+:0x[0-9a-f]+)'
+
+# Numbers shared by every branch of a chain (444 XX XX, 0850/0800/0900), never proof of the same place
+SHARED_PHONE_PATTERN = r'^(?:444\d{4}|\+90(?:850|800|900)\d{7})$'
+
+
+def _on_unique(series, transform):
+    """
+    Apply a string transform to the distinct values of a series only
+
+    Merged sweeps repeat the same cities, districts, phones and addresses many
+    times over, so transforming the uniques and broadcasting them back keeps
+    the per-element string work proportional to the number of distinct values.
+    """
+    codes, uniques = pd.factorize(series.astype('string'))
+    if len(uniques) == 0:
+        return pd.Series(pd.NA, index=series.index, dtype='string')
+    transformed = transform(pd.Series(uniques, dtype='string')).to_numpy()
+    result = pd.Series(transformed.take(codes), index=series.index, dtype='string')
+    return result.mask(codes == -1)
+
+
+def _fold(values):
+    return (
+        values.str.translate(TURKISH_FOLD)
+        .str.lower()
+        .str.replace(r'[^a-z0-9]+', ' ', regex=True)
+        .str.strip()
+    )
+
+
+def _extract_unique(series, pattern):
+    """str.extract over the distinct values of a series, broadcast back to every row"""
+    codes, uniques = pd.factorize(series.astype('string'))
+    extracted = pd.Series(uniques, dtype='string').str.extract(pattern)
+    if len(extracted) == 0:
+        return pd.DataFrame(pd.NA, index=series.index, columns=extracted.columns, dtype='string')
+    rows = extracted.iloc[np.where(codes == -1, 0, codes)].set_index(series.index)
+    rows[codes == -1] = pd.NA
+    return rows
+
+
+def fold_text(series):
+    """Lowercase, ASCII-fold Turkish letters and collapse punctuation to single spaces"""
+    return _on_unique(series, _fold)
+
+
+@lru_cache(maxsize=1)
+def load_gazetteer():
+    """
+    Load the il/ilçe gazetteer with folded lookup keys
+
+    Central districts are also indexed as "<il> merkez", the way Google Maps
+    writes them in addresses (e.g. "Adıyaman Merkez/Adıyaman").
+    """
+    gazetteer = pd.read_csv(GAZETTEER_FILE, dtype=str)
+    gazetteer['il_key'] = fold_text(gazetteer['il'])
+    gazetteer['ilce_key'] = fold_text(gazetteer['ilce'])
+
+    central = gazetteer[gazetteer['ilce'] == 'Merkez'].copy()
+    central['ilce_key'] = central['il_key'] + ' merkez'
+
+    gazetteer = pd.concat([gazetteer, central], ignore_index=True)
+    gazetteer['pair_key'] = gazetteer['il_key'] + '|' + gazetteer['ilce_key']
+    return gazetteer.drop_duplicates('pair_key')
+
+
+def _normalize_phone_values(phones):
+    digits = phones.str.replace(r'\D', '', regex=True)
+    digits = digits.str.replace(r'^00', '', regex=True)
+    length = digits.str.len()
+
+    national = pd.Series(pd.NA, index=phones.index, dtype='string')
+    national = national.mask((length == 12) & digits.str.startswith('90'), digits.str[2:])
+    national = national.mask((length == 11) & digits.str.startswith('0'), digits.str[1:])
+    national = national.mask((length == 10) & ~digits.str.startswith('0'), digits)
+
+    valid = national.str.match(r'^[2-58]\d{9}$').fillna(False).astype(bool)
+    normalized = ('+90' + national).where(valid)
+    normalized = normalized.mask((length == 7) & digits.str.startswith('444'), digits)
+    return normalized.fillna(phones)
+
+
+def normalize_phones(phones):
+    """
+    Normalize Turkish phone numbers to E.164 (+90XXXXXXXXXX)
+
+    Handles "+90 ...", "0090...", "0 (212) ...", and numbers without a prefix.
+    Nationwide "444 XX XX" numbers have no E.164 form and are kept as digits;
+    anything else that cannot be normalized is left as it was.
+    """
+    return _on_unique(phones, _normalize_phone_values)
+
+
+def resolve_locations(df):
+    """
+    Resolve city (il) and district (ilçe) against the gazetteer
+
+    Names come from the "<postcode> <district>/<city>" address tail and fall
+    back to existing city/district columns; the province falls back to the
+    postcode's plate code. Unresolved names are kept as written.
+
+    Returns:
+        DataFrame with canonical 'city', 'district' and 'postcode' columns
+    """
+    gazetteer = load_gazetteer()
+    provinces = gazetteer.drop_duplicates('il_key')
+
+    address = df['address'] if 'address' in df else pd.Series(pd.NA, index=df.index)
+    parts = _extract_unique(address, ADDRESS_LOCATION_PATTERN.pattern)
+
+    city_raw = parts['city'].str.strip()
+    district_raw = parts['district'].str.strip()
+    if 'city' in df:
+        city_raw = city_raw.fillna(df['city'].astype('string'))
+    if 'district' in df:
+        district_raw = district_raw.fillna(df['district'].astype('string'))
+
+    city = fold_text(city_raw).map(provinces.set_index('il_key')['il'])
+    city = city.fillna(parts['postcode'].str[:2].map(provinces.set_index('plate')['il']))
+
+    pair_key = fold_text(city) + '|' + fold_text(district_raw)
+    district = pair_key.map(gazetteer.set_index('pair_key')['ilce'])
+
+    out = df.copy()
+    out['city'] = city.fillna(city_raw)
+    out['district'] = district.fillna(district_raw)
+    out['postcode'] = parts['postcode']
+    return out
+
+
+def normalize_businesses(df):
+    """Normalize phones, place IDs and locations of a business DataFrame"""
+    out = resolve_locations(df)
+
+    if 'phone' in out:
+        out['phone'] = normalize_phones(out['phone'])
+
+    if 'google_maps_url' in out:
+        url_place_id = _extract_unique(out['google_maps_url'], PLACE_ID_PATTERN)[0]
+        out['place_id'] = out['place_id'].fillna(url_place_id) if 'place_id' in out else url_place_id
+
+    return out
+
+
+def _exact_key_edges(keys):
+    """Edges linking every row to the first row sharing the same key"""
+    valid = keys.notna() & (keys.astype('string').str.len() > 0)
+    positions = pd.Series(np.arange(len(keys)))[valid.to_numpy()]
+    first = positions.groupby(keys[valid].to_numpy()).transform('min')
+    return positions.to_numpy(), first.to_numpy()
+
+
+def _location_blocks(df):
+    """Integer block ID per row for its city and district"""
+    # Block IDs are built from integer codes rather than concatenated strings
+    return pd.DataFrame({
+        'city': pd.factorize(fold_text(df['city']))[0],
+        'district': pd.factorize(fold_text(df['district']))[0],
+    }).groupby(['city', 'district'], sort=False).ngroup().to_numpy()
+
+
+def _phone_keys(df, block):
+    """
+    Phones usable as a duplicate link
+
+    Chain-wide service numbers and numbers seen in more than one city/district
+    (a head office line listed by every branch) are left out.
+    """
+    phones = df['phone'].astype('string').reset_index(drop=True)
+    shared = phones.str.match(SHARED_PHONE_PATTERN).fillna(False).astype(bool)
+    blocks_per_phone = pd.Series(block).groupby(phones.to_numpy()).transform('nunique')
+    return phones.mask(shared | (blocks_per_phone > 1))
+
+
+def _fuzzy_edges(df, name_similarity, address_similarity, window):
+    """
+    Edges between rows with similar name and address
+
+    Rows are blocked by city and district, then sorted by name and separately
+    by address; each row is only compared with the next `window` rows of its
+    block in either order (sorted neighbourhood), so the number of comparisons
+    grows linearly with the number of rows. Pairs with different building
+    numbers are ruled out before any string comparison.
+    """
+    if 'name' not in df or 'address' not in df:
+        return np.array([], dtype=int), np.array([], dtype=int)
+
+    name_key = _on_unique(df['name'], lambda values: _fold(values).str.replace(' ', '', regex=False))
+    address_key = fold_text(df['address'])
+
+    block = _location_blocks(df)
+
+    # Building number ("No:5") as an integer code, -1 when the address has none
+    number = pd.factorize(_extract_unique(address_key, r'\bno\s*(\d+)')[0])[0]
+
+    candidates = pd.DataFrame({
+        'block': block, 'number': number, 'name': name_key, 'address': address_key,
+        'position': np.arange(len(df))
+    })
+    candidates = candidates[candidates['name'].str.len().fillna(0) > 0]
+    candidates = candidates[candidates['address'].notna()]
+
+    # Rows repeating the same name and address (the bulk of merged sweeps) are
+    # linked directly; only their distinct pairs are compared
+    pair_codes = candidates.groupby(['name', 'address'], sort=False).ngroup().reset_index(drop=True)
+    identical_sources, identical_targets = _exact_key_edges(pair_codes)
+    edge_sources = [candidates['position'].to_numpy()[identical_sources]]
+    edge_targets = [candidates['position'].to_numpy()[identical_targets]]
+
+    candidates = candidates[~pair_codes.duplicated().to_numpy()]
+
+    sources, targets = [], []
+    for sort_column in ('name', 'address'):
+        ordered = candidates.sort_values(['block', sort_column], kind='stable')
+        blocks = ordered['block'].to_numpy()
+        numbers = ordered['number'].to_numpy()
+        names = ordered['name'].to_numpy(dtype=object)
+        addresses = ordered['address'].to_numpy(dtype=object)
+        positions = ordered['position'].to_numpy()
+        name_lengths = ordered['name'].str.len().to_numpy(dtype=float)
+
+        for offset in range(1, window + 1):
+            left = np.arange(len(ordered) - offset)
+            right = left + offset
+            # SequenceMatcher.ratio() can never exceed 2 * shorter / (len a + len b)
+            lengths_a, lengths_b = name_lengths[left], name_lengths[right]
+            upper_bound = 2 * np.minimum(lengths_a, lengths_b) / (lengths_a + lengths_b)
+            same_number = (
+                (numbers[left] == numbers[right]) | (numbers[left] == -1) | (numbers[right] == -1)
+            )
+            keep = (blocks[left] == blocks[right]) & same_number & (upper_bound >= name_similarity)
+
+            for i, j in zip(left[keep], right[keep]):
+                if SequenceMatcher(None, names[i], names[j]).ratio() < name_similarity:
+                    continue
+                if SequenceMatcher(None, addresses[i], addresses[j]).ratio() < address_similarity:
+                    continue
+                sources.append(positions[i])
+                targets.append(positions[j])
+
+    edge_sources.append(np.array(sources, dtype=int))
+    edge_targets.append(np.array(targets, dtype=int))
+    return np.concatenate(edge_sources), np.concatenate(edge_targets)
+
+
+def _connected_components(size, sources, targets):
+    """Label every node with the smallest node of its component (vectorized label propagation)"""
+    labels = np.arange(size)
+    while True:
+        updated = labels.copy()
+        np.minimum.at(updated, sources, updated[targets])
+        np.minimum.at(updated, targets, updated[sources])
+        updated = updated[updated]  # pointer jumping
+        if np.array_equal(updated, labels):
+            return labels
+        labels = updated
+
+
+def _split_place_id_conflicts(labels, place_codes, sources, targets):
+    """
+    Rebuild components that hold more than one place ID
+
+    Rows without a place ID can chain two different places together. The
+    edges of such components are replayed through a union-find that refuses
+    every merge that would put two place IDs into one cluster.
+    """
+    has_id = place_codes >= 0
+    ids_per_label = pd.Series(place_codes[has_id]).groupby(labels[has_id]).nunique()
+    conflicted = ids_per_label.index[ids_per_label > 1].to_numpy()
+    if len(conflicted) == 0:
+        return labels
+
+    in_conflict = np.isin(labels, conflicted)
+    parent = {}
+    place = {}
+
+    def find(node):
+        root = node
+        while parent.get(root, root) != root:
+            root = parent[root]
+        while node != root:
+            parent[node], node = root, parent[node]
+        return root
+
+    edges = in_conflict[sources]  # Both ends of an edge share a component
+    for source, target in zip(sources[edges], targets[edges]):
+        source_root, target_root = find(source), find(target)
+        if source_root == target_root:
+            continue
+        source_place = place.get(source_root, place_codes[source_root])
+        target_place = place.get(target_root, place_codes[target_root])
+        if source_place >= 0 and target_place >= 0 and source_place != target_place:
+            continue
+        root, child = min(source_root, target_root), max(source_root, target_root)
+        parent[child] = root
+        place[root] = max(source_place, target_place)
+
+    labels = labels.copy()
+    for row in np.flatnonzero(in_conflict):
+        labels[row] = find(row)
+    return labels
+
+
+def cluster_duplicates(df, name_similarity=DEDUPE_NAME_SIMILARITY,
+                       address_similarity=DEDUPE_ADDRESS_SIMILARITY,
+                       window=DEDUPE_WINDOW):
+    """
+    Assign a cluster label to every row; rows in the same cluster are the same business
+
+    Rows are linked by equal place ID, equal phone (except numbers shared by
+    chains, see _phone_keys), or similar name + address within the same city
+    and district. Rows with different place IDs are never put in one
+    cluster. Connected components are found with vectorized label
+    propagation over the link arrays.
+
+    Returns:
+        numpy array of cluster labels (the smallest row position in each cluster)
+    """
+    df = df.reset_index(drop=True)
+    edge_sources, edge_targets = [], []
+    # Place ID edges come first so conflicting components are rebuilt around them
+    if 'place_id' in df:
+        sources, targets = _exact_key_edges(df['place_id'])
+        edge_sources.append(sources)
+        edge_targets.append(targets)
+    if 'phone' in df:
+        sources, targets = _exact_key_edges(_phone_keys(df, _location_blocks(df)))
+        edge_sources.append(sources)
+        edge_targets.append(targets)
+
+    sources, targets = _fuzzy_edges(df, name_similarity, address_similarity, window)
+    edge_sources.append(sources)
+    edge_targets.append(targets)
+
+    sources = np.concatenate(edge_sources)
+    targets = np.concatenate(edge_targets)
+
+    if 'place_id' not in df:
+        return _connected_components(len(df), sources, targets)
+
+    place_codes = pd.factorize(df['place_id'].astype('string'))[0]
+    distinct = (
+        (place_codes[sources] >= 0) & (place_codes[targets] >= 0)
+        & (place_codes[sources] != place_codes[targets])
+    )
+    sources, targets = sources[~distinct], targets[~distinct]
+
+    labels = _connected_components(len(df), sources, targets)
+    return _split_place_id_conflicts(labels, place_codes, sources, targets)
+
+
+def deduplicate_businesses(df, **kwargs):
+    """
+    Collapse duplicate businesses into one row each
+
+    Within a cluster the most complete row wins and its missing fields are
+    filled from the other duplicates. A 'duplicates' column holds the
+    number of scraped rows merged into each result; rows from earlier
+    exports bring their own counts along.
+    """
+    df = df.reset_index(drop=True)
+    if df.empty:
+        return df.assign(duplicates=pd.Series(dtype=int))
+
+    labels = cluster_duplicates(df, **kwargs)
+    ranked = df.assign(_cluster=labels, _completeness=df.notna().sum(axis=1))
+    ranked = ranked.sort_values(['_cluster', '_completeness'], ascending=[True, False], kind='stable')
+
+    grouped = ranked.groupby('_cluster', sort=False)
+    merged = grouped.first()
+    if 'duplicates' in ranked:
+        counts = ranked['duplicates'].fillna(1).astype(int)
+        merged['duplicates'] = counts.groupby(ranked['_cluster'], sort=False).sum()
+    else:
+        merged['duplicates'] = grouped.size()
+    return merged.drop(columns='_completeness').reset_index(drop=True)
+
+
+def postprocess_businesses(data, **kwargs):
+    """
+    Run the bulk normalization and dedupe stage
+
+    Args:
+        data: DataFrame, pyarrow Table or list of business dictionaries
+
+    Returns:
+        Normalized, deduplicated DataFrame
+    """
+    if hasattr(data, 'to_pandas'):
+        df = data.to_pandas()
+    elif isinstance(data, pd.DataFrame):
+        df = data
+    else:
+        df = pd.DataFrame(data)
+
+    start_time = time.time()
+    normalized = normalize_businesses(df)
+    deduplicated = deduplicate_businesses(normalized, **kwargs)
+
+    logger.info(
+        f"Post-processed {len(df)} rows into {len(deduplicated)} businesses "
+        f"in {time.time() - start_time:.1f}s"
+    )
+    return deduplicated
@@ -0,0 +1,184 @@
+"""
+Pool of persistent Chrome profiles shared across runs
+"""
+import os
+import shutil
+import time
+import logging
+from scraper_modules.utils import get_random_user_agent
+from config import PROFILES_DIR, MAX_PROFILE_SIZE_MB, PROFILE_LOCK_STALE_HOURS
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+LOCK_FILE = 'scraper.lock'
+FLAG_FILE = 'flagged'
+USER_AGENT_FILE = 'user_agent.txt'
+
+# Chrome's own lock files, left behind when a browser crashes
+CHROME_SINGLETON_FILES = ['SingletonLock', 'SingletonCookie', 'SingletonSocket']
+
+# Cache directories that can be dropped without losing cookies or consent state
+CACHE_DIRS = [
+    os.path.join('Default', 'Cache'),
+    os.path.join('Default', 'Code Cache'),
+    os.path.join('Default', 'GPUCache'),
+    os.path.join('Default', 'Service Worker', 'CacheStorage'),
+    'ShaderCache',
+    'GrShaderCache',
+]
+
+
+def _dir_size_mb(path):
+    """Total size of all files below path in megabytes"""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total / (1024 * 1024)
+
+
+def _pid_alive(pid):
+    """Check whether a process is still running (POSIX only)"""
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class ProfilePool:
+    """
+    Manages on-disk Chrome user-data-dir profiles, one per window slot
+
+    Each slot is locked while a browser uses it, so parallel runs never share
+    a profile. Profiles keep the HTTP cache, cookies and consent state between
+    runs; oversized profiles have their caches pruned and profiles marked as
+    flagged (captcha / block) are wiped and start cold on next use.
+    """
+
+    def __init__(self, base_dir=PROFILES_DIR, max_size_mb=MAX_PROFILE_SIZE_MB):
+        self.base_dir = os.path.abspath(base_dir)
+        self.max_size_mb = max_size_mb
+        os.makedirs(self.base_dir, exist_ok=True)
+
+    def slot_path(self, slot):
+        """Directory of the profile for a window slot"""
+        return os.path.join(self.base_dir, f"slot_{slot}")
+
+    def _lock(self, path):
+        """Try to take the slot lock, clearing stale locks of dead runs"""
+        lock_path = os.path.join(path, LOCK_FILE)
+
+        if os.path.exists(lock_path):
+            try:
+                with open(lock_path) as f:
+                    pid = int(f.read().strip() or 0)
+                age_hours = (time.time() - os.path.getmtime(lock_path)) / 3600
+            except (OSError, ValueError):
+                pid, age_hours = 0, 0
+
+            # The PID may have been reused by an unrelated process, so old locks
+            # are stale either way. os.kill(pid, 0) would terminate the process
+            # on Windows, so only the age is checked there.
+            stale = age_hours > PROFILE_LOCK_STALE_HOURS
+            if os.name != 'nt':
+                stale = stale or not pid or not _pid_alive(pid)
+
+            if not stale:
+                return False
+            logger.info(f"Removing stale profile lock: {lock_path}")
+            try:
+                os.remove(lock_path)
+            except OSError:
+                return False
+
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            return False
+        with os.fdopen(fd, 'w') as f:
+            f.write(str(os.getpid()))
+        return True
+
+    def acquire(self, slot=0):
+        """
+        Lock a profile, starting at the given slot and moving on to the
+        next free one if another run holds it
+
+        Returns:
+            Tuple of (profile path, True if the profile is warm)
+        """
+        while True:
+            path = self.slot_path(slot)
+            os.makedirs(path, exist_ok=True)
+            if self._lock(path):
+                break
+            logger.info(f"Profile slot {slot} is in use, trying slot {slot + 1}")
+            slot += 1
+
+        if os.path.exists(os.path.join(path, FLAG_FILE)):
+            logger.warning(f"Profile slot {slot} was flagged, rotating to a fresh profile")
+            self._wipe(path)
+        else:
+            size_mb = _dir_size_mb(path)
+            if size_mb > self.max_size_mb:
+                logger.info(f"Profile slot {slot} is {size_mb:.0f} MB, pruning caches")
+                self._prune_caches(path)
+
+        for name in CHROME_SINGLETON_FILES:
+            singleton = os.path.join(path, name)
+            if os.path.lexists(singleton):
+                os.remove(singleton)
+
+        warm = os.path.isdir(os.path.join(path, 'Default'))
+        logger.info(f"Using {'warm' if warm else 'cold'} profile slot {slot}: {path}")
+        return path, warm
+
+    def release(self, path):
+        """Release the lock on a profile"""
+        try:
+            os.remove(os.path.join(path, LOCK_FILE))
+        except OSError:
+            pass
+
+    def mark_flagged(self, path):
+        """Mark a profile as flagged so it is rotated on next acquire"""
+        with open(os.path.join(path, FLAG_FILE), 'w') as f:
+            f.write(str(int(time.time())))
+        logger.warning(f"Profile flagged for rotation: {path}")
+
+    def user_agent(self, path):
+        """User agent pinned to a profile, so cookies always travel with the same UA"""
+        ua_path = os.path.join(path, USER_AGENT_FILE)
+        if os.path.exists(ua_path):
+            with open(ua_path, encoding='utf-8') as f:
+                user_agent = f.read().strip()
+            if user_agent:
+                return user_agent
+
+        user_agent = get_random_user_agent()
+        with open(ua_path, 'w', encoding='utf-8') as f:
+            f.write(user_agent)
+        return user_agent
+
+    def _prune_caches(self, path):
+        """Delete cache directories, keeping cookies and local storage"""
+        for cache_dir in CACHE_DIRS:
+            shutil.rmtree(os.path.join(path, cache_dir), ignore_errors=True)
+
+    def _wipe(self, path):
+        """Delete everything in a profile except its lock"""
+        for name in os.listdir(path):
+            if name == LOCK_FILE:
+                continue
+            target = os.path.join(path, name)
+            if os.path.isdir(target) and not os.path.islink(target):
+                shutil.rmtree(target, ignore_errors=True)
+            else:
+                os.remove(target)
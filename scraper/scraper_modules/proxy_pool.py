@@ -0,0 +1,294 @@
+"""
+Proxy pool with per-exit rate limiting and automatic quarantine
+"""
+import ssl
+import time
+import socket
+import threading
+import logging
+import http.client
+import urllib.request
+from urllib.parse import urlparse
+from config import (
+    PROXIES, PROXY_LIST_FILE, REQUESTS_PER_MINUTE_PER_EXIT,
+    PROXY_MAX_FAILURES, PROXY_QUARANTINE_SECONDS,
+    PROXY_PROBE_URL, PROXY_PROBE_TIMEOUT
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Proxy schemes both Chrome and the health probe can use. Chrome does not
+# know "socks5h" (its socks5 already resolves host names on the proxy)
+SUPPORTED_SCHEMES = ('http', 'https', 'socks5')
+
+
+def load_proxies(proxies=None, list_file=PROXY_LIST_FILE):
+    """
+    Combine configured proxies with those listed (one per line) in a file
+
+    Proxies with an unsupported scheme (e.g. socks4) are skipped with a warning.
+    """
+    urls = list(proxies if proxies is not None else PROXIES)
+    if list_file:
+        with open(list_file, encoding='utf-8') as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    urls.append(line)
+
+    supported = []
+    for url in dict.fromkeys(urls):
+        if urlparse(url).scheme.lower() in SUPPORTED_SCHEMES:
+            supported.append(url)
+        else:
+            logger.warning(f"Skipping proxy {url}: scheme must be one of {', '.join(SUPPORTED_SCHEMES)}")
+    return supported
+
+
+def _recv_exact(sock, size):
+    data = b''
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise OSError("SOCKS5 proxy closed the connection")
+        data += chunk
+    return data
+
+
+class Socks5HTTPSConnection(http.client.HTTPSConnection):
+    """HTTPS connection tunnelled through a SOCKS5 proxy (no authentication)"""
+
+    def __init__(self, proxy_host, proxy_port, host, **kwargs):
+        super().__init__(host, **kwargs)
+        self.proxy_address = (proxy_host, proxy_port)
+
+    def connect(self):
+        sock = socket.create_connection(self.proxy_address, self.timeout)
+        try:
+            # Greeting: version 5, one method offered, "no authentication"
+            sock.sendall(b'\x05\x01\x00')
+            if _recv_exact(sock, 2) != b'\x05\x00':
+                raise OSError("SOCKS5 proxy refused the handshake")
+
+            # CONNECT by host name, so the proxy resolves it
+            host = self.host.encode('idna')
+            sock.sendall(b'\x05\x01\x00\x03' + bytes([len(host)]) + host + self.port.to_bytes(2, 'big'))
+            reply = _recv_exact(sock, 4)
+            if reply[1] != 0:
+                raise OSError(f"SOCKS5 CONNECT failed with code {reply[1]}")
+            address_length = {1: 4, 4: 16}.get(reply[3]) or _recv_exact(sock, 1)[0]
+            _recv_exact(sock, address_length + 2)  # Bound address and port
+
+            self.sock = self._context.wrap_socket(sock, server_hostname=self.host)
+        except Exception:
+            sock.close()
+            raise
+
+
+class ProxyExit:
+    """
+    A single egress (proxy URL, or None for the direct connection)
+    with its own request-rate budget and health statistics
+    """
+
+    def __init__(self, url, requests_per_minute=REQUESTS_PER_MINUTE_PER_EXIT):
+        self.url = url
+        self.interval = 60.0 / requests_per_minute
+        self.next_slot = 0.0
+        self.assigned = 0
+        self.requests = 0
+        self.successes = 0
+        self.failures = {}
+        self.consecutive_failures = 0
+        self.total_latency = 0.0
+        self.quarantined_until = 0.0
+        self.quarantines = 0
+        self.probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def name(self):
+        return self.url or 'direct'
+
+    @property
+    def quarantined(self):
+        return time.time() < self.quarantined_until
+
+    def wait_for_slot(self):
+        """Block until this exit's rate budget allows another request"""
+        with self._lock:
+            now = time.time()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+            self.requests += 1
+        if slot > now:
+            time.sleep(slot - now)
+
+    def summary(self):
+        """Success and latency statistics for this exit"""
+        attempts = self.successes + sum(self.failures.values())
+        return {
+            'exit': self.name,
+            'requests': self.requests,
+            'successes': self.successes,
+            'failures': dict(self.failures),
+            'success_rate': round(self.successes / attempts, 3) if attempts else None,
+            'avg_latency': round(self.total_latency / self.successes, 2) if self.successes else None,
+            'quarantines': self.quarantines,
+            'state': 'quarantined' if self.quarantined else 'healthy'
+        }
+
+
+class ProxyPool:
+    """
+    Assigns each browser window an exit and enforces a separate request
+    budget per exit, so throughput scales with the number of exits instead
+    of being capped by a single IP.
+
+    Exits that fail repeatedly (captcha, errors) are quarantined and
+    re-probed before being handed out again. With no proxies configured the
+    pool holds a single direct exit, so the rate budget still applies.
+
+    Note: Chrome's --proxy-server flag does not accept credentials, so
+    proxies must be IP-whitelisted.
+    """
+
+    def __init__(self, proxies=None, list_file=PROXY_LIST_FILE,
+                 requests_per_minute=REQUESTS_PER_MINUTE_PER_EXIT,
+                 max_failures=PROXY_MAX_FAILURES, quarantine_seconds=PROXY_QUARANTINE_SECONDS,
+                 probe_url=PROXY_PROBE_URL, probe_context=None):
+        urls = load_proxies(proxies, list_file) or [None]
+        self.exits = [ProxyExit(url, requests_per_minute) for url in urls]
+        self.max_failures = max_failures
+        self.quarantine_seconds = quarantine_seconds
+        self.probe_url = probe_url
+        self.probe_context = probe_context or ssl.create_default_context()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.exits)
+
+    def probe(self, proxy_exit):
+        """Check whether an exit can reach Google Maps without being challenged"""
+        try:
+            if proxy_exit.url and urlparse(proxy_exit.url).scheme.lower() == 'socks5':
+                return self._probe_socks5(proxy_exit.url)
+
+            if proxy_exit.url:
+                handler = urllib.request.ProxyHandler({'http': proxy_exit.url, 'https': proxy_exit.url})
+            else:
+                handler = urllib.request.ProxyHandler({})
+            opener = urllib.request.build_opener(
+                handler, urllib.request.HTTPSHandler(context=self.probe_context)
+            )
+            with opener.open(self.probe_url, timeout=PROXY_PROBE_TIMEOUT) as response:
+                return response.status == 200 and '/sorry/' not in response.geturl()
+        except Exception as e:
+            logger.warning(f"Probe failed for exit {proxy_exit.name}: {e}")
+            return False
+
+    def _probe_socks5(self, proxy_url):
+        """Probe through a SOCKS5 exit; urllib's ProxyHandler only speaks HTTP CONNECT"""
+        proxy = urlparse(proxy_url)
+        target = urlparse(self.probe_url)
+        connection = Socks5HTTPSConnection(
+            proxy.hostname, proxy.port or 1080, target.hostname,
+            port=target.port or 443, timeout=PROXY_PROBE_TIMEOUT, context=self.probe_context
+        )
+        try:
+            connection.request('GET', target.path or '/', headers={'User-Agent': 'Mozilla/5.0'})
+            response = connection.getresponse()
+            location = response.getheader('Location') or ''
+            return response.status < 400 and '/sorry/' not in location
+        finally:
+            connection.close()
+
+    def _awaiting_probe(self, proxy_exit):
+        """Whether an exit came out of quarantine and has not passed a re-probe yet"""
+        return proxy_exit.quarantines > 0 and proxy_exit.consecutive_failures >= self.max_failures
+
+    def _reprobe(self):
+        """
+        Re-probe exits whose quarantine ran out
+
+        Exits are picked under the lock but probed without it, so other windows
+        can keep reporting results while a probe waits on the network.
+        """
+        with self._lock:
+            due = [
+                e for e in self.exits
+                if not e.quarantined and not e.probing and self._awaiting_probe(e)
+            ]
+            for proxy_exit in due:
+                proxy_exit.probing = True
+
+        for proxy_exit in due:
+            healthy = self.probe(proxy_exit)
+            with self._lock:
+                proxy_exit.probing = False
+                if healthy:
+                    logger.info(f"Exit {proxy_exit.name} passed re-probe, back in rotation")
+                    proxy_exit.consecutive_failures = 0
+                else:
+                    self._quarantine(proxy_exit)
+
+    def assign(self):
+        """Assign the least used healthy exit, waiting out quarantines if all are down"""
+        while True:
+            self._reprobe()
+            with self._lock:
+                candidates = [
+                    e for e in self.exits
+                    if not e.quarantined and not self._awaiting_probe(e)
+                ]
+                if candidates:
+                    proxy_exit = min(candidates, key=lambda e: e.assigned)
+                    proxy_exit.assigned += 1
+                    return proxy_exit
+                quarantined = [e.quarantined_until for e in self.exits if e.quarantined]
+                # Without quarantined exits another window is probing; check back shortly
+                wait = min(quarantined) - time.time() if quarantined else 0
+
+            logger.warning(f"All {len(self.exits)} exit(s) unavailable, waiting {max(wait, 1):.0f}s")
+            time.sleep(max(wait, 1))
+
+    def release(self, proxy_exit):
+        """Return an exit when its window closes"""
+        with self._lock:
+            proxy_exit.assigned = max(proxy_exit.assigned - 1, 0)
+
+    def report_success(self, proxy_exit, latency):
+        with self._lock:
+            proxy_exit.successes += 1
+            proxy_exit.total_latency += latency
+            proxy_exit.consecutive_failures = 0
+
+    def report_failure(self, proxy_exit, reason):
+        """Record a failure (e.g. 'captcha', 'error') and quarantine the exit if it keeps failing"""
+        with self._lock:
+            proxy_exit.failures[reason] = proxy_exit.failures.get(reason, 0) + 1
+            proxy_exit.consecutive_failures += 1
+            if proxy_exit.consecutive_failures >= self.max_failures and not proxy_exit.quarantined:
+                self._quarantine(proxy_exit)
+
+    def _quarantine(self, proxy_exit):
+        proxy_exit.quarantined_until = time.time() + self.quarantine_seconds
+        proxy_exit.quarantines += 1
+        logger.warning(
+            f"Exit {proxy_exit.name} quarantined for {self.quarantine_seconds}s "
+            f"after {proxy_exit.consecutive_failures} consecutive failures"
+        )
+
+    def summary(self):
+        """Per-exit success and latency report"""
+        return [proxy_exit.summary() for proxy_exit in self.exits]
+
+    def log_summary(self):
+        for stats in self.summary():
+            latency = f"{stats['avg_latency']}s" if stats['avg_latency'] is not None else '-'
+            logger.info(
+                f"Exit {stats['exit']}: {stats['requests']} requests, "
+                f"success rate {stats['success_rate']}, avg latency {latency}, "
+                f"failures {stats['failures']}, quarantines {stats['quarantines']} ({stats['state']})"
+            )
@@ -0,0 +1,185 @@
+"""
+Failure classification, retry budget and circuit breaker for place page extraction
+"""
+import random
+import threading
+import logging
+from selenium.common.exceptions import (
+    TimeoutException, WebDriverException, InvalidSessionIdException, NoSuchWindowException
+)
+from config import (
+    MAX_RETRIES_PER_RUN, MAX_ATTEMPTS_PER_URL, RETRY_BACKOFF_BASE, RETRY_BACKOFF_MAX,
+    CIRCUIT_BREAKER_THRESHOLD, CIRCUIT_BREAKER_PAUSE
+)
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Failure kinds
+TIMEOUT = 'timeout'  # Page or element did not load in time
+THROTTLED = 'throttled'  # Google served a captcha / unusual traffic page
+DRIVER_DEAD = 'driver_dead'  # Browser crashed or the session is gone
+PARSE_MISS = 'parse_miss'  # Page loaded but the expected elements are missing
+ERROR = 'error'  # Anything else
+
+FAILURE_KINDS = (TIMEOUT, THROTTLED, DRIVER_DEAD, PARSE_MISS, ERROR)
+
+# WebDriverException messages meaning the browser session cannot be used anymore
+DRIVER_DEAD_MESSAGES = (
+    'invalid session id', 'session deleted', 'chrome not reachable',
+    'disconnected', 'target window already closed', 'tab crashed'
+)
+
+
+class ExtractionError(Exception):
+    """Raised when a place page could not be extracted, carrying the failure kind"""
+
+    def __init__(self, kind, message=''):
+        super().__init__(message or kind)
+        self.kind = kind
+
+
+def classify_failure(error):
+    """
+    Sort an exception raised during extraction into a failure kind
+
+    Args:
+        error: The exception
+
+    Returns:
+        One of FAILURE_KINDS
+    """
+    if isinstance(error, ExtractionError):
+        return error.kind
+    if isinstance(error, TimeoutException):
+        return TIMEOUT
+    if isinstance(error, (InvalidSessionIdException, NoSuchWindowException, ConnectionError)):
+        return DRIVER_DEAD
+    if isinstance(error, WebDriverException):
+        message = (error.msg or '').lower()
+        if any(text in message for text in DRIVER_DEAD_MESSAGES):
+            return DRIVER_DEAD
+        if 'timeout' in message or 'timed out' in message:
+            return TIMEOUT
+        return ERROR
+    # urllib3 errors when chromedriver itself is gone
+    if type(error).__module__.startswith('urllib3'):
+        return DRIVER_DEAD
+    return ERROR
+
+
+def backoff_delay(attempt, base=RETRY_BACKOFF_BASE, maximum=RETRY_BACKOFF_MAX):
+    """Exponential backoff with jitter for the given retry attempt (1 = first retry)"""
+    delay = min(base * 2 ** (attempt - 1), maximum)
+    return random.uniform(delay / 2, delay)
+
+
+class FailureTracker:
+    """
+    Run-wide failure counts and retry budget, shared by all windows
+
+    The budget caps the total number of retries in a run, so a session
+    that keeps failing cannot turn every page into several page loads.
+    """
+
+    def __init__(self, max_retries=MAX_RETRIES_PER_RUN, max_attempts=MAX_ATTEMPTS_PER_URL):
+        self.max_retries = max_retries
+        self.max_attempts = max_attempts
+        self.failures = {kind: 0 for kind in FAILURE_KINDS}
+        self.retries = 0
+        self.recovered = 0
+        self.given_up = []  # Place records lost for good
+        self.review_failures = []  # Places whose reviews could not be (fully) harvested
+        self.circuit_trips = 0
+        self._lock = threading.Lock()
+
+    def record_failure(self, kind):
+        with self._lock:
+            self.failures[kind] += 1
+
+    def try_retry(self, attempts):
+        """
+        Take one retry from the budget
+
+        Args:
+            attempts: Attempts already made for the URL
+
+        Returns:
+            True if the URL may be retried
+        """
+        with self._lock:
+            if attempts >= self.max_attempts or self.retries >= self.max_retries:
+                return False
+            self.retries += 1
+            return True
+
+    def record_recovered(self):
+        with self._lock:
+            self.recovered += 1
+
+    def record_given_up(self, url, kind):
+        with self._lock:
+            self.given_up.append({'url': url, 'kind': kind})
+
+    def record_review_failure(self, url, kind):
+        with self._lock:
+            self.review_failures.append({'url': url, 'kind': kind})
+
+    def record_circuit_trip(self):
+        with self._lock:
+            self.circuit_trips += 1
+
+    def summary(self):
+        """Failure counts, retries, lost URLs and failed review harvests of the run"""
+        return {
+            'failures': dict(self.failures),
+            'retries': self.retries,
+            'retry_budget': self.max_retries,
+            'recovered': self.recovered,
+            'given_up': len(self.given_up),
+            'review_failures': len(self.review_failures),
+            'circuit_trips': self.circuit_trips
+        }
+
+    def log_summary(self):
+        stats = self.summary()
+        failures = ', '.join(f"{kind} {count}" for kind, count in stats['failures'].items() if count) or 'none'
+        logger.info(
+            f"Failures: {failures}; retries {stats['retries']}/{stats['retry_budget']}, "
+            f"recovered {stats['recovered']}, given up {stats['given_up']}, "
+            f"review harvests failed {stats['review_failures']}, "
+            f"circuit breaker trips {stats['circuit_trips']}"
+        )
+        for failed in self.given_up:
+            logger.warning(f"Given up ({failed['kind']}): {failed['url']}")
+        for failed in self.review_failures:
+            logger.warning(f"Reviews not harvested ({failed['kind']}): {failed['url']}")
+
+
+class CircuitBreaker:
+    """
+    Per-window breaker that opens after repeated throttling
+
+    Once open, the window should stop loading pages, pause and come back
+    on a fresh browser (and exit) instead of hammering a blocked session.
+    """
+
+    def __init__(self, threshold=CIRCUIT_BREAKER_THRESHOLD, pause_seconds=CIRCUIT_BREAKER_PAUSE):
+        self.threshold = threshold
+        self.pause_seconds = pause_seconds
+        self.consecutive_throttles = 0
+
+    def record(self, kind):
+        """
+        Record a failure
+
+        Returns:
+            True if the breaker is now open
+        """
+        if kind == THROTTLED:
+            self.consecutive_throttles += 1
+        return self.consecutive_throttles >= self.threshold
+
+    def reset(self):
+        """Close the breaker (after a successful page or a fresh browser)"""
+        self.consecutive_throttles = 0
@@ -0,0 +1,272 @@
+"""
+Review harvesting for Google Maps place pages
+"""
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException
+import json
+import logging
+import threading
+import time
+from scraper_modules.utils import random_delay, clean_rating, parse_relative_date
+from config import MAX_REVIEWS_PER_PLACE, REVIEW_SCROLL_PAUSE_TIME
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+REVIEW_SELECTOR = 'div.jftiEf[data-review-id]'
+
+# Expand truncated review texts ("Daha fazla" / "More") before reading them
+EXPAND_REVIEWS_SCRIPT = """
+document.querySelectorAll(arguments[0] + ' button.w8nwRe').forEach(b => b.click());
+"""
+
+# Read every rendered review and detach it from the DOM in the same round trip,
+# so the pane only ever holds the reviews loaded since the previous batch
+COLLECT_REVIEWS_SCRIPT = """
+const out = [];
+document.querySelectorAll(arguments[0]).forEach(node => {
+    const pick = selector => {
+        const el = node.querySelector(selector);
+        return el ? el.textContent.trim() : null;
+    };
+    const stars = node.querySelector('span.kvMYJc');
+    out.push({
+        review_id: node.getAttribute('data-review-id'),
+        author: pick('div.d4r55'),
+        rating: stars ? stars.getAttribute('aria-label') : pick('span.fzvQIb'),
+        date: pick('span.rsqaWe') || pick('span.xRkPPb'),
+        text: pick('span.wiI7pd')
+    });
+    node.remove();
+});
+return out;
+"""
+
+# Walk up from the first review to the element that actually scrolls
+FIND_SCROLL_CONTAINER_SCRIPT = """
+let el = document.querySelector(arguments[0]);
+while (el && el !== document.body) {
+    const style = window.getComputedStyle(el);
+    if (el.scrollHeight > el.clientHeight && /(auto|scroll)/.test(style.overflowY)) {
+        return el;
+    }
+    el = el.parentElement;
+}
+return null;
+"""
+
+
+class JsonlReviewSink:
+    """Appends harvested reviews to a JSON Lines file as they arrive (thread-safe)"""
+
+    def __init__(self, filepath):
+        self.filepath = filepath
+        self.count = 0
+        self._file = open(filepath, 'a', encoding='utf-8')
+        self._lock = threading.Lock()
+
+    def write(self, review):
+        """Write a single review and flush it to disk"""
+        line = json.dumps(review, ensure_ascii=False) + '\n'
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            self.count += 1
+
+    def close(self):
+        """Close the underlying file"""
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class ReviewScraper:
+    """Streams reviews from a place page's reviews pane to a sink"""
+
+    def __init__(self, driver, sink, max_reviews=MAX_REVIEWS_PER_PLACE, since=None, poll=None):
+        """
+        Args:
+            driver: Selenium driver that is already on the place page
+            sink: Object with a write(review) method (e.g. JsonlReviewSink)
+            max_reviews: Per-place review cap
+            since: Optional datetime; harvesting stops at the first older review
+                (older reviews are only skipped if the list cannot be sorted by date)
+            poll: Optional callable run after every batch to drain Chrome's
+                performance log (GoogleMapsScraper passes collect_network_stats);
+                by default the log is read and discarded
+        """
+        self.driver = driver
+        self.sink = sink
+        self.max_reviews = max_reviews
+        self.since = since
+        self.poll = poll or self.drain_performance_log
+        self.wait = WebDriverWait(driver, 10)
+        self.total_reviews = 0
+        self.total_seconds = 0.0
+        self._metrics_enabled = False
+
+    def set_driver(self, driver):
+        """Switch to a new driver (e.g. after the window was recycled)"""
+        self.driver = driver
+        self.wait = WebDriverWait(driver, 10)
+        self._metrics_enabled = False
+
+    def open_reviews_pane(self):
+        """Click the reviews tab on the current place page"""
+        try:
+            tab = self.wait.until(EC.element_to_be_clickable((
+                By.CSS_SELECTOR,
+                "button[role='tab'][aria-label*='Yorumlar'], button[role='tab'][aria-label*='Reviews']"
+            )))
+            tab.click()
+            self.wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, REVIEW_SELECTOR)))
+            return True
+        except TimeoutException:
+            logger.warning("Reviews pane not available")
+            return False
+
+    def sort_by_newest(self):
+        """Sort reviews newest first so the date cutoff can end the scroll early"""
+        try:
+            sort_button = self.driver.find_element(
+                By.CSS_SELECTOR,
+                "button[aria-label*='Sırala'], button[aria-label*='Sort']"
+            )
+            sort_button.click()
+            options = self.wait.until(EC.presence_of_all_elements_located(
+                (By.CSS_SELECTOR, "div[role='menuitemradio']")
+            ))
+            # Menu order: most relevant, newest, highest, lowest
+            if len(options) > 1:
+                options[1].click()
+                random_delay(1, 2)
+                return True
+        except Exception as e:
+            logger.warning(f"Could not sort reviews by newest: {e}")
+        return False
+
+    def drain_performance_log(self):
+        """Discard the performance log, which otherwise grows with every scroll"""
+        try:
+            self.driver.get_log('performance')
+        except Exception:
+            pass
+
+    def browser_memory(self):
+        """Return JS heap size (MB) and DOM node count of the current page"""
+        try:
+            if not self._metrics_enabled:
+                self.driver.execute_cdp_cmd('Performance.enable', {})
+                self._metrics_enabled = True
+            metrics = self.driver.execute_cdp_cmd('Performance.getMetrics', {})['metrics']
+            values = {m['name']: m['value'] for m in metrics}
+            return {
+                'js_heap_mb': round(values.get('JSHeapUsedSize', 0) / (1024 * 1024), 1),
+                'dom_nodes': int(values.get('Nodes', 0))
+            }
+        except Exception:
+            return {'js_heap_mb': None, 'dom_nodes': None}
+
+    def harvest(self, place_url, place_name=None):
+        """
+        Harvest reviews for the place currently loaded in the driver
+
+        Args:
+            place_url: Google Maps URL of the place (stored with each review)
+            place_name: Business name (stored with each review)
+
+        Returns:
+            Dictionary with harvest statistics
+        """
+        start_time = time.time()
+        harvested = 0
+        stop_reason = 'exhausted'
+        seen_ids = set()
+
+        if not self.open_reviews_pane():
+            return {'reviews': 0, 'stop_reason': 'unavailable'}
+
+        # The date cutoff can only end the scroll when reviews come newest first;
+        # if sorting fails, older reviews are skipped and scrolling goes on
+        sorted_by_date = bool(self.since) and self.sort_by_newest()
+        if self.since and not sorted_by_date:
+            logger.warning("Reviews not sorted by date, filtering by date instead of stopping at it")
+
+        container = self.driver.execute_script(FIND_SCROLL_CONTAINER_SCRIPT, REVIEW_SELECTOR)
+        idle_scrolls = 0
+
+        while idle_scrolls < 3:
+            self.driver.execute_script(EXPAND_REVIEWS_SCRIPT, REVIEW_SELECTOR)
+            batch = self.driver.execute_script(COLLECT_REVIEWS_SCRIPT, REVIEW_SELECTOR)
+            idle_scrolls = idle_scrolls + 1 if not batch else 0
+            # Every scroll loads more reviews and photos, each logging network events
+            self.poll()
+
+            for review in batch:
+                if review['review_id'] in seen_ids:
+                    continue
+                seen_ids.add(review['review_id'])
+
+                review_date = parse_relative_date(review['date'])
+                if self.since and review_date and review_date < self.since:
+                    if sorted_by_date:
+                        stop_reason = 'cutoff'
+                        break
+                    continue
+
+                review['rating'] = clean_rating(review['rating'])
+                review['date_estimate'] = review_date.strftime('%Y-%m-%d') if review_date else None
+                review['place_name'] = place_name
+                review['google_maps_url'] = place_url
+                self.sink.write(review)
+                harvested += 1
+
+                if harvested >= self.max_reviews:
+                    stop_reason = 'cap'
+                    break
+
+            if stop_reason != 'exhausted':
+                break
+
+            if container is None:
+                container = self.driver.execute_script(FIND_SCROLL_CONTAINER_SCRIPT, REVIEW_SELECTOR)
+            if container is not None:
+                self.driver.execute_script(
+                    "arguments[0].scrollTo(0, arguments[0].scrollHeight);",
+                    container
+                )
+            time.sleep(REVIEW_SCROLL_PAUSE_TIME)
+
+        elapsed = time.time() - start_time
+        self.total_reviews += harvested
+        self.total_seconds += elapsed
+
+        stats = {
+            'reviews': harvested,
+            'seconds': round(elapsed, 1),
+            'reviews_per_second': round(harvested / elapsed, 2) if elapsed else 0,
+            'stop_reason': stop_reason
+        }
+        stats.update(self.browser_memory())
+
+        logger.info(
+            f"Harvested {harvested} reviews in {stats['seconds']}s "
+            f"({stats['reviews_per_second']} reviews/s, stop: {stop_reason}, "
+            f"JS heap: {stats['js_heap_mb']} MB, DOM nodes: {stats['dom_nodes']})"
+        )
+        return stats
+
+    def summary(self):
+        """Return aggregate throughput over all harvested places"""
+        return {
+            'reviews': self.total_reviews,
+            'seconds': round(self.total_seconds, 1),
+            'reviews_per_second': round(self.total_reviews / self.total_seconds, 2) if self.total_seconds else 0
+        }
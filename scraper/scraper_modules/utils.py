@@ -1,8 +1,10 @@
 """
 Utility functions for the scraper
 """
+import re
 import time
 import random
+from datetime import datetime, timedelta
 from fake_useragent import UserAgent
 from config import MIN_DELAY, MAX_DELAY
 
@@ -52,6 +54,16 @@ def build_search_query(category, city, district=None):
     return f"{category} {city}"
 
 
+# Patterns compiled once at import instead of on every call
+RATING_PATTERN = re.compile(r'(\d+(?:[.,]\d+)?)')
+REVIEW_COUNT_PATTERN = re.compile(r'(\d[\d.,]*)')
+
+# Location tail of a Google Maps address, e.g. "..., 34710 Kadıköy/İstanbul, Türkiye"
+ADDRESS_LOCATION_PATTERN = re.compile(
+    r'(?:^|,)\s*(?:(?P<postcode>\d{5})\s+)?(?P<district>[^,/]+)/(?P<city>[^,/]+?)(?:,\s*(?:Türkiye|Turkey))?\s*$'
+)
+
+
 def clean_phone_number(phone):
     """Clean and format phone number"""
     if not phone:
@@ -62,30 +74,75 @@ def clean_phone_number(phone):
 
 
 def clean_rating(rating_text):
-    """Extract numeric rating from text"""
+    """Extract numeric rating from text (e.g., "4,5" or "4.5 stars" -> 4.5)"""
     if not rating_text:
         return None
-    try:
-        # Extract first number from string (e.g., "4.5 stars" -> 4.5)
-        import re
-        match = re.search(r'(\d+\.?\d*)', rating_text)
-        if match:
-            return float(match.group(1))
-    except:
-        pass
+    match = RATING_PATTERN.search(rating_text)
+    if match:
+        return float(match.group(1).replace(',', '.'))
     return None
 
 
 def clean_review_count(review_text):
-    """Extract review count from text"""
+    """Extract review count from text (e.g., "(1.234 yorum)" or "1,234 reviews" -> 1234)"""
     if not review_text:
         return 0
-    try:
-        # Extract number from text like "(123 reviews)" or "123 yorumlar"
-        import re
-        match = re.search(r'(\d+)', review_text)
-        if match:
-            return int(match.group(1))
-    except:
-        pass
+    match = REVIEW_COUNT_PATTERN.search(review_text)
+    if match:
+        return int(match.group(1).replace('.', '').replace(',', ''))
     return 0
+
+
+def split_address_location(address):
+    """
+    Split a Google Maps address into (district, city)
+
+    Uses the "<postcode> <district>/<city>" tail of Turkish addresses and
+    falls back to the last comma separated parts. Names are returned as
+    written; the postprocess stage resolves them against the gazetteer.
+    """
+    if not address:
+        return None, None
+    match = ADDRESS_LOCATION_PATTERN.search(address)
+    if match:
+        return match.group('district').strip(), match.group('city').strip()
+
+    parts = [part.strip() for part in address.split(',')]
+    if len(parts) >= 3:
+        return parts[-2], parts[-1]
+    if len(parts) == 2:
+        return None, parts[-1]
+    return None, None
+
+
+# Approximate length of each unit Google Maps uses in relative review dates
+RELATIVE_DATE_UNITS = {
+    'dakika': timedelta(minutes=1), 'minute': timedelta(minutes=1),
+    'saat': timedelta(hours=1), 'hour': timedelta(hours=1),
+    'gün': timedelta(days=1), 'day': timedelta(days=1),
+    'hafta': timedelta(weeks=1), 'week': timedelta(weeks=1),
+    'ay': timedelta(days=30), 'month': timedelta(days=30),
+    'yıl': timedelta(days=365), 'year': timedelta(days=365),
+}
+
+RELATIVE_DATE_PATTERN = re.compile(
+    r'(\d+|bir|an?|one)\s+(dakika|saat|gün|hafta|ay|yıl|minute|hour|day|week|month|year)s?\b'
+)
+
+
+def parse_relative_date(date_text, now=None):
+    """
+    Convert a relative review date to an approximate datetime
+
+    Handles Turkish and English forms such as "3 hafta önce", "bir yıl önce",
+    "2 months ago" or "Düzenlendi: 5 gün önce". Returns None if the text
+    cannot be parsed.
+    """
+    if not date_text:
+        return None
+    match = RELATIVE_DATE_PATTERN.search(date_text.lower())
+    if not match:
+        return None
+    amount, unit = match.groups()
+    amount = int(amount) if amount.isdigit() else 1
+    return (now or datetime.now()) - amount * RELATIVE_DATE_UNITS[unit]
@@ -0,0 +1,55 @@
+"""
+Record Google Maps response fixtures for the parser tests
+
+Runs a search with network capture, opens the first result and saves the
+first /search?tbm=map and /maps/preview/place bodies to tests/fixtures/.
+Redact names, phone numbers and tracking tokens before committing them.
+
+Usage:
+    python tests/record_fixtures.py "güzellik salonu kadıköy"
+"""
+import os
+import sys
+import time
+from selenium.webdriver.common.by import By
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from scraper_modules.browser_manager import BrowserManager  # noqa: E402
+from scraper_modules.google_maps import GoogleMapsScraper  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+FIXTURE_FILES = {
+    '/search?tbm=map': 'search_tbm_map.txt',
+    '/maps/preview/place': 'preview_place.txt'
+}
+
+
+def main():
+    query = sys.argv[1] if len(sys.argv) > 1 else "güzellik salonu kadıköy"
+    with BrowserManager(num_windows=1, use_profiles=False) as drivers:
+        scraper = GoogleMapsScraper(drivers[0], backend='network')
+        if not scraper.search(query):
+            sys.exit("Search failed")
+
+        # Opening a result in the panel loads its place preview
+        drivers[0].find_element(By.CSS_SELECTOR, 'div[role="feed"] > div > div > a').click()
+        time.sleep(5)
+        scraper.collect_network_stats()
+
+        saved = set()
+        for response in scraper.network.take_responses():
+            for pattern, filename in FIXTURE_FILES.items():
+                if pattern in response['url'] and filename not in saved:
+                    with open(os.path.join(FIXTURES_DIR, filename), 'w', encoding='utf-8') as f:
+                        f.write(response['body'])
+                    saved.add(filename)
+                    print(f"Saved {filename} from {response['url']}")
+
+        missing = set(FIXTURE_FILES.values()) - saved
+        if missing:
+            sys.exit(f"No response captured for: {', '.join(sorted(missing))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Parser tests against Maps response bodies in tests/fixtures/
+
+synthetic_*.txt are hand-built from the field positions in maps_parser, so
+they only show the parser is consistent with itself. The recorded bodies
+(search_tbm_map.txt, preview_place.txt, written by tests/record_fixtures.py)
+check those positions against Google; their tests are skipped until the
+captures are committed.
+"""
+import os
+import pytest
+from scraper_modules.maps_parser import (
+    load_payload, parse_response, FEATURE_ID_PATTERN, LAYOUT_VERIFIED
+)
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+RECORDED_FIXTURES = ('search_tbm_map.txt', 'preview_place.txt')
+
+
+def read_fixture(name):
+    with open(os.path.join(FIXTURES_DIR, name), encoding='utf-8') as f:
+        return f.read()
+
+
+def recorded(name):
+    if not os.path.exists(os.path.join(FIXTURES_DIR, name)):
+        pytest.skip(f"No recorded {name}; run tests/record_fixtures.py")
+    return read_fixture(name)
+
+
+@pytest.fixture
+def search_businesses():
+    return parse_response(read_fixture('synthetic_search_tbm_map.txt'))
+
+
+def test_search_envelope_is_unwrapped():
+    payload = load_payload(read_fixture('synthetic_search_tbm_map.txt'))
+    assert isinstance(payload, list)
+
+
+def test_search_yields_every_feed_place(search_businesses):
+    # Feed metadata entries and places nested inside a place are skipped
+    assert [b['name'] for b in search_businesses] == [
+        'Redacted Güzellik Salonu', 'Redacted Nail Studio'
+    ]
+
+
+def test_search_place_fields(search_businesses):
+    business = search_businesses[0]
+    assert business['phone'] == '02165550101'
+    assert business['latitude'] == pytest.approx(40.9871234)
+    assert business['longitude'] == pytest.approx(29.0261234)
+    assert business['place_id'] == '0x14cab87a1b2c3d4e:0x5f6a7b8c9d0e1f2a'
+    assert business['google_place_id'] == 'ChIJTk1234redactedAAAAAAAAAA'
+    assert business['category'] == 'Güzellik salonu'
+    assert business['rating'] == 4.7
+    assert business['reviews_count'] == 312
+    assert business['website'] == 'https://example-salon.com.tr/'
+    assert (business['district'], business['city']) == ('Kadıköy', 'İstanbul')
+    assert business['google_maps_url'].endswith('!1s0x14cab87a1b2c3d4e:0x5f6a7b8c9d0e1f2a')
+
+
+def test_search_place_without_website(search_businesses):
+    business = search_businesses[1]
+    assert business['website'] is None
+    assert business['phone'] == '4440123'
+
+
+def test_preview_place():
+    businesses = parse_response(read_fixture('synthetic_preview_place.txt'))
+    assert len(businesses) == 1
+    business = businesses[0]
+    assert business['name'] == 'Redacted Güzellik Salonu'
+    assert business['phone'] == '02165550101'
+    assert (business['latitude'], business['longitude']) == pytest.approx((40.9871234, 29.0261234))
+    assert business['place_id'] == '0x14cab87a1b2c3d4e:0x5f6a7b8c9d0e1f2a'
+    assert business['google_place_id'] == 'ChIJTk1234redactedAAAAAAAAAA'
+
+
+def test_non_json_body_yields_nothing():
+    assert parse_response('<html>captcha</html>') == []
+
+
+@pytest.mark.parametrize('name', RECORDED_FIXTURES)
+def test_recorded_places_have_core_fields(name):
+    businesses = parse_response(recorded(name))
+    assert businesses
+    for business in businesses:
+        assert business['name']
+        assert FEATURE_ID_PATTERN.match(business['place_id'])
+        assert business['address']
+        assert isinstance(business['latitude'], float) and isinstance(business['longitude'], float)
+        assert business['google_place_id'] is None or business['google_place_id'].startswith('ChIJ')
+
+
+def test_network_backend_stays_off_without_recordings():
+    if LAYOUT_VERIFIED:
+        missing = [name for name in RECORDED_FIXTURES if not os.path.exists(os.path.join(FIXTURES_DIR, name))]
+        assert not missing, f"LAYOUT_VERIFIED needs recorded fixtures: {missing}"
@@ -0,0 +1,147 @@
+"""
+Normalization and dedupe tests on small hand-written business frames
+"""
+import numpy as np
+import pandas as pd
+import pytest
+from scraper_modules.postprocess import (
+    normalize_phones, resolve_locations, deduplicate_businesses,
+    _phone_keys, _location_blocks, _split_place_id_conflicts
+)
+
+
+@pytest.mark.parametrize('raw, expected', [
+    ('+90 216 555 12 34', '+902165551234'),
+    ('0090 216 555 12 34', '+902165551234'),
+    ('0 (216) 555 12 34', '+902165551234'),
+    ('216 555 12 34', '+902165551234'),
+    ('0532 555 12 34', '+905325551234'),
+    ('444 12 34', '4441234'),
+    ('+49 30 1234567', '+49 30 1234567'),  # Not Turkish: kept as written
+    ('+44 20 7946 0958', '+44 20 7946 0958'),
+])
+def test_normalize_phones(raw, expected):
+    assert normalize_phones(pd.Series([raw])).iloc[0] == expected
+
+
+def test_normalize_phones_keeps_missing():
+    assert normalize_phones(pd.Series([None, '0216 555 12 34'])).isna().tolist() == [True, False]
+
+
+def test_resolve_locations_from_address():
+    df = pd.DataFrame({'address': ['Caferağa, Moda Cd. No:5, 34710 kadikoy/Istanbul, Türkiye']})
+    row = resolve_locations(df).iloc[0]
+    assert (row['city'], row['district'], row['postcode']) == ('İstanbul', 'Kadıköy', '34710')
+
+
+def test_resolve_locations_merkez_alias():
+    df = pd.DataFrame({'address': ['Atatürk Blv. No:1, 02100 Adıyaman Merkez/Adıyaman']})
+    row = resolve_locations(df).iloc[0]
+    assert (row['city'], row['district']) == ('Adıyaman', 'Merkez')
+
+
+def test_resolve_locations_falls_back_to_postcode_plate():
+    # City written in a form the gazetteer does not know; the postcode's plate code decides
+    df = pd.DataFrame({'address': ['Moda Cd. No:5, 34710 Kadıköy/Ist.']})
+    row = resolve_locations(df).iloc[0]
+    assert (row['city'], row['district']) == ('İstanbul', 'Kadıköy')
+
+
+def test_resolve_locations_keeps_unknown_names():
+    df = pd.DataFrame({'address': [None], 'city': ['Atlantis'], 'district': ['Downtown']})
+    row = resolve_locations(df).iloc[0]
+    assert (row['city'], row['district']) == ('Atlantis', 'Downtown')
+
+
+def phone_keys(rows):
+    df = pd.DataFrame(rows, columns=['phone', 'city', 'district'])
+    return _phone_keys(df, _location_blocks(df)).tolist()
+
+
+def test_phone_keys_link_same_block():
+    keys = phone_keys([
+        ('+902165551234', 'İstanbul', 'Kadıköy'),
+        ('+902165551234', 'İstanbul', 'Kadıköy'),
+    ])
+    assert keys == ['+902165551234', '+902165551234']
+
+
+def test_phone_keys_skip_numbers_shared_across_branches():
+    # A head office line listed by branches in different districts
+    keys = phone_keys([
+        ('+902125550000', 'İstanbul', 'Kadıköy'),
+        ('+902125550000', 'İstanbul', 'Beşiktaş'),
+    ])
+    assert all(pd.isna(key) for key in keys)
+
+
+@pytest.mark.parametrize('phone', ['4441234', '+908505551234', '+908005551234', '+909005551234'])
+def test_phone_keys_skip_service_numbers(phone):
+    keys = phone_keys([(phone, 'İstanbul', 'Kadıköy'), (phone, 'İstanbul', 'Kadıköy')])
+    assert all(pd.isna(key) for key in keys)
+
+
+def test_split_place_id_conflicts_keeps_place_ids_apart():
+    # 0 (place A) - 1 (no id) - 2 (place B): one component before the split
+    labels = np.array([0, 0, 0])
+    place_codes = np.array([0, -1, 1])
+    sources, targets = np.array([0, 1]), np.array([1, 2])
+    labels = _split_place_id_conflicts(labels, place_codes, sources, targets)
+    assert labels[0] != labels[2]
+    assert labels[1] in (labels[0], labels[2])
+
+
+def test_split_place_id_conflicts_leaves_clean_components():
+    labels = np.array([0, 0, 2])
+    place_codes = np.array([0, -1, 1])
+    result = _split_place_id_conflicts(labels, place_codes, np.array([0]), np.array([1]))
+    assert result.tolist() == [0, 0, 2]
+
+
+def test_deduplicate_never_merges_different_place_ids():
+    df = pd.DataFrame({
+        'name': ['Moda Güzellik', 'Moda Guzellik', 'Moda Güzellik Salonu'],
+        'address': ['Moda Cd. No:5', 'Moda Cd. No:5', 'Moda Cd. No:5'],
+        'city': ['İstanbul'] * 3,
+        'district': ['Kadıköy'] * 3,
+        'phone': [None, '+902165551234', '+902165551234'],
+        'place_id': ['0x1:0xa', None, '0x1:0xb'],
+    })
+    merged = deduplicate_businesses(df)
+    assert sorted(merged['place_id'].dropna()) == ['0x1:0xa', '0x1:0xb']
+    assert merged['duplicates'].sum() == 3
+
+
+def test_deduplicate_fills_from_duplicates():
+    df = pd.DataFrame({
+        'name': ['Moda Güzellik', 'Moda Güzellik'],
+        'address': ['Moda Cd. No:5', 'Moda Cd. No:5'],
+        'city': ['İstanbul'] * 2,
+        'district': ['Kadıköy'] * 2,
+        'phone': ['+902165551234', '+902165551234'],
+        'website': [None, 'https://moda.example'],
+    })
+    merged = deduplicate_businesses(df)
+    assert len(merged) == 1
+    assert merged.loc[0, 'website'] == 'https://moda.example'
+    assert merged.loc[0, 'duplicates'] == 2
+
+
+def test_deduplicate_remerge_sums_duplicates():
+    # An earlier export (already merged from 3 rows) meets 2 fresh rows
+    df = pd.DataFrame({
+        'name': ['Moda Güzellik'] * 3,
+        'address': ['Moda Cd. No:5'] * 3,
+        'city': ['İstanbul'] * 3,
+        'district': ['Kadıköy'] * 3,
+        'phone': ['+902165551234'] * 3,
+        'duplicates': [3, None, None],
+    })
+    merged = deduplicate_businesses(df)
+    assert len(merged) == 1
+    assert merged.loc[0, 'duplicates'] == 5
+
+
+def test_deduplicate_empty_frame():
+    merged = deduplicate_businesses(pd.DataFrame(columns=['name', 'address']))
+    assert merged.empty and 'duplicates' in merged
@@ -0,0 +1,107 @@
+"""
+Profile pool tests on a temporary directory (no browser needed)
+"""
+import os
+import time
+import pytest
+from scraper_modules import profile_pool
+from scraper_modules.profile_pool import ProfilePool, LOCK_FILE, FLAG_FILE, USER_AGENT_FILE
+
+
+@pytest.fixture
+def pool(tmp_path):
+    return ProfilePool(base_dir=str(tmp_path), max_size_mb=1)
+
+
+def write(path, content='x'):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(content)
+
+
+def write_lock(pool, slot, pid, age_hours=0):
+    lock_path = os.path.join(pool.slot_path(slot), LOCK_FILE)
+    write(lock_path, str(pid))
+    mtime = time.time() - age_hours * 3600
+    os.utime(lock_path, (mtime, mtime))
+    return lock_path
+
+
+def test_acquire_locks_slot(pool):
+    path, warm = pool.acquire()
+    assert path == pool.slot_path(0)
+    assert not warm
+    with open(os.path.join(path, LOCK_FILE)) as f:
+        assert int(f.read()) == os.getpid()
+
+
+def test_locked_slot_moves_to_next_free_one(pool):
+    first, _ = pool.acquire()
+    second, _ = pool.acquire()
+    assert (first, second) == (pool.slot_path(0), pool.slot_path(1))
+
+    pool.release(first)
+    assert not os.path.exists(os.path.join(first, LOCK_FILE))
+    assert pool.acquire()[0] == first
+
+
+def test_stale_lock_of_dead_process_is_recovered(pool, monkeypatch):
+    monkeypatch.setattr(profile_pool, '_pid_alive', lambda pid: False)
+    write_lock(pool, 0, 999999)
+    assert pool.acquire()[0] == pool.slot_path(0)
+
+
+def test_old_lock_is_recovered_even_if_pid_is_alive(pool, monkeypatch):
+    # The PID of a crashed run may have been reused by another process
+    monkeypatch.setattr(profile_pool, '_pid_alive', lambda pid: True)
+    write_lock(pool, 0, 12345, age_hours=profile_pool.PROFILE_LOCK_STALE_HOURS + 1)
+    assert pool.acquire()[0] == pool.slot_path(0)
+
+
+def test_recent_lock_of_live_process_is_kept(pool, monkeypatch):
+    monkeypatch.setattr(profile_pool, '_pid_alive', lambda pid: True)
+    lock_path = write_lock(pool, 0, 12345, age_hours=1)
+    assert pool.acquire()[0] == pool.slot_path(1)
+    with open(lock_path) as f:
+        assert f.read() == '12345'
+
+
+def test_flagged_profile_is_wiped(pool):
+    path = pool.slot_path(0)
+    write(os.path.join(path, 'Default', 'Cookies'))
+    write(os.path.join(path, USER_AGENT_FILE), 'Mozilla/5.0 flagged')
+    pool.mark_flagged(path)
+
+    acquired, warm = pool.acquire()
+    assert acquired == path and not warm
+    assert sorted(os.listdir(path)) == [LOCK_FILE]
+
+
+def test_oversized_profile_has_caches_pruned(pool):
+    path = pool.slot_path(0)
+    cache_file = os.path.join(path, 'Default', 'Cache', 'data_0')
+    write(cache_file, 'x' * (2 * 1024 * 1024))
+    write(os.path.join(path, 'Default', 'Cookies'))
+    write(os.path.join(path, 'SingletonLock'))
+
+    _, warm = pool.acquire()
+    assert warm
+    assert not os.path.exists(cache_file)
+    assert os.path.exists(os.path.join(path, 'Default', 'Cookies'))
+    assert not os.path.lexists(os.path.join(path, 'SingletonLock'))
+
+
+def test_small_profile_keeps_caches(pool):
+    path = pool.slot_path(0)
+    cache_file = os.path.join(path, 'Default', 'Cache', 'data_0')
+    write(cache_file)
+    pool.acquire()
+    assert os.path.exists(cache_file)
+
+
+def test_user_agent_is_pinned_to_profile(pool, monkeypatch):
+    agents = iter(['Mozilla/5.0 first', 'Mozilla/5.0 second'])
+    monkeypatch.setattr(profile_pool, 'get_random_user_agent', lambda: next(agents))
+    path, _ = pool.acquire()
+    assert pool.user_agent(path) == 'Mozilla/5.0 first'
+    assert pool.user_agent(path) == 'Mozilla/5.0 first'
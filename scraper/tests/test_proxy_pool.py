@@ -0,0 +1,250 @@
+"""
+Proxy pool tests against local proxy stand-ins
+
+A local TLS server plays Google Maps. An HTTP CONNECT stub and a SOCKS5
+stub tunnel to it, so probes take the same path as they do against real
+exits.
+"""
+import os
+import ssl
+import time
+import select
+import socket
+import struct
+import threading
+import socketserver
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from scraper_modules.proxy_pool import ProxyPool, ProxyExit, load_proxies
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures')
+CERT_FILE = os.path.join(FIXTURES_DIR, 'localhost.pem')
+KEY_FILE = os.path.join(FIXTURES_DIR, 'localhost.key')
+
+
+def relay(left, right):
+    """Copy bytes both ways until one side closes"""
+    sockets = [left, right]
+    try:
+        while True:
+            readable, _, _ = select.select(sockets, [], [], 5)
+            if not readable:
+                return
+            for sock in readable:
+                data = sock.recv(65536)
+                if not data:
+                    return
+                (right if sock is left else left).sendall(data)
+    except OSError:
+        return
+    finally:
+        right.close()
+
+
+class MapsHandler(BaseHTTPRequestHandler):
+    """Answers like Maps: 200, or a redirect to the captcha page while blocked"""
+
+    def do_GET(self):
+        if self.server.blocked and not self.path.startswith('/sorry/'):
+            self.send_response(302)
+            self.send_header('Location', '/sorry/index')
+        else:
+            self.send_response(200)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+class ConnectHandler(BaseHTTPRequestHandler):
+    """HTTP CONNECT proxy stub"""
+
+    def do_CONNECT(self):
+        self.server.connects += 1
+        time.sleep(self.server.delay)
+        host, port = self.path.rsplit(':', 1)
+        upstream = socket.create_connection((host, int(port)))
+        self.send_response(200, 'Connection established')
+        self.end_headers()
+        relay(self.connection, upstream)
+        self.close_connection = True
+
+    def log_message(self, *args):
+        pass
+
+
+class Socks5Handler(socketserver.BaseRequestHandler):
+    """SOCKS5 proxy stub (no authentication, CONNECT by host name)"""
+
+    def handle(self):
+        sock = self.request
+        version, methods = sock.recv(2)
+        sock.recv(methods)
+        sock.sendall(b'\x05\x00')
+
+        _, command, _, address_type = sock.recv(4)
+        assert command == 1 and address_type == 3
+        host = sock.recv(sock.recv(1)[0]).decode()
+        port = struct.unpack('>H', sock.recv(2))[0]
+        self.server.connects += 1
+
+        upstream = socket.create_connection((host, port))
+        sock.sendall(b'\x05\x00\x00\x01' + socket.inet_aton('127.0.0.1') + struct.pack('>H', port))
+        relay(sock, upstream)
+
+
+def serve(server):
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture(autouse=True)
+def no_proxy_env(monkeypatch):
+    # Keep urllib from bypassing the stub for localhost
+    for name in ('no_proxy', 'NO_PROXY', 'http_proxy', 'https_proxy', 'HTTP_PROXY', 'HTTPS_PROXY'):
+        monkeypatch.delenv(name, raising=False)
+
+
+@pytest.fixture
+def maps():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), MapsHandler)
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(CERT_FILE, KEY_FILE)
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+    server.blocked = False
+    yield serve(server)
+    server.shutdown()
+
+
+@pytest.fixture
+def connect_proxy():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), ConnectHandler)
+    server.connects = 0
+    server.delay = 0
+    yield serve(server)
+    server.shutdown()
+
+
+@pytest.fixture
+def socks_proxy():
+    server = socketserver.ThreadingTCPServer(('127.0.0.1', 0), Socks5Handler)
+    server.daemon_threads = True
+    server.connects = 0
+    yield serve(server)
+    server.shutdown()
+
+
+def make_pool(proxy_urls, maps, **kwargs):
+    return ProxyPool(
+        proxies=proxy_urls, list_file=None,
+        probe_url=f"https://localhost:{maps.server_address[1]}/maps",
+        probe_context=ssl.create_default_context(cafile=CERT_FILE),
+        **kwargs
+    )
+
+
+def test_unsupported_schemes_are_skipped():
+    proxies = ['socks4://10.0.0.1:1080', 'socks5h://10.0.0.3:1080', 'http://10.0.0.2:3128']
+    assert load_proxies(proxies, None) == ['http://10.0.0.2:3128']
+
+
+def test_probe_through_connect_proxy(maps, connect_proxy):
+    pool = make_pool([f"http://127.0.0.1:{connect_proxy.server_address[1]}"], maps)
+    assert pool.probe(pool.exits[0])
+    maps.blocked = True
+    assert not pool.probe(pool.exits[0])
+    assert connect_proxy.connects >= 2
+
+
+def test_probe_through_socks5_proxy(maps, socks_proxy):
+    pool = make_pool([f"socks5://127.0.0.1:{socks_proxy.server_address[1]}"], maps)
+    assert pool.probe(pool.exits[0])
+    maps.blocked = True
+    assert not pool.probe(pool.exits[0])
+    assert socks_proxy.connects == 2
+
+
+def quarantine(pool, proxy_exit):
+    for _ in range(pool.max_failures):
+        pool.report_failure(proxy_exit, 'captcha')
+
+
+def test_wait_for_slot_spaces_requests():
+    proxy_exit = ProxyExit(None, requests_per_minute=600)  # One request every 0.1s
+    start = time.time()
+    for _ in range(4):
+        proxy_exit.wait_for_slot()
+    elapsed = time.time() - start
+    assert 0.3 <= elapsed < 0.6
+    assert proxy_exit.requests == 4
+
+
+def test_quarantine_after_max_failures(maps, connect_proxy):
+    port = connect_proxy.server_address[1]
+    pool = make_pool([f"http://127.0.0.1:{port}", f"http://localhost:{port}"], maps, max_failures=2)
+    first, second = pool.exits
+
+    pool.report_failure(first, 'captcha')
+    assert not first.quarantined
+    pool.report_failure(first, 'captcha')
+    assert first.quarantined
+
+    assert pool.assign() is second
+    assert pool.assign() is second
+    assert first.summary()['state'] == 'quarantined'
+
+
+def test_readmission_after_probe(maps, connect_proxy):
+    pool = make_pool(
+        [f"http://127.0.0.1:{connect_proxy.server_address[1]}"], maps,
+        max_failures=2, quarantine_seconds=0.2
+    )
+    proxy_exit = pool.exits[0]
+    quarantine(pool, proxy_exit)
+    time.sleep(0.3)
+
+    assert pool.assign() is proxy_exit
+    assert connect_proxy.connects == 1
+    assert proxy_exit.consecutive_failures == 0
+    assert proxy_exit.quarantines == 1
+
+
+def test_failed_probe_quarantines_again(maps, connect_proxy):
+    pool = make_pool(
+        [f"http://127.0.0.1:{connect_proxy.server_address[1]}"], maps,
+        max_failures=2, quarantine_seconds=0.2
+    )
+    proxy_exit = pool.exits[0]
+    quarantine(pool, proxy_exit)
+    time.sleep(0.3)
+
+    maps.blocked = True
+    pool._reprobe()
+    assert proxy_exit.quarantined
+    assert proxy_exit.quarantines == 2
+
+
+def test_probe_does_not_block_reports(maps, connect_proxy):
+    port = connect_proxy.server_address[1]
+    pool = make_pool(
+        [f"http://127.0.0.1:{port}", f"http://localhost:{port}"], maps,
+        max_failures=1, quarantine_seconds=0.1
+    )
+    slow, other = pool.exits
+    quarantine(pool, slow)
+    time.sleep(0.2)
+    connect_proxy.delay = 1.0
+
+    prober = threading.Thread(target=pool._reprobe)
+    prober.start()
+    time.sleep(0.2)
+    assert slow.probing
+
+    start = time.time()
+    pool.report_success(other, 0.5)
+    pool.report_failure(other, 'error')
+    assert time.time() - start < 0.2
+
+    prober.join()
+    assert not slow.probing and not slow.quarantined
@@ -0,0 +1,281 @@
+"""
+Failure classification around per-place extraction, with a stand-in driver
+"""
+import pytest
+import urllib3
+from selenium.common.exceptions import (
+    NoSuchElementException, InvalidSessionIdException, NoSuchWindowException,
+    TimeoutException, WebDriverException
+)
+from selenium.webdriver.support.ui import WebDriverWait
+import scraper_modules.google_maps as google_maps
+from scraper_modules.google_maps import GoogleMapsScraper, PLACE_PANEL_RENDERED_SCRIPT
+from scraper_modules.resilience import (
+    ExtractionError, FailureTracker, CircuitBreaker, classify_failure,
+    TIMEOUT, THROTTLED, PARSE_MISS, DRIVER_DEAD, ERROR
+)
+from main import GoogleMapsScraperApp
+
+
+class FakeDriver:
+    """Driver whose place page never shows a business name"""
+
+    current_url = 'https://www.google.com/maps/place/x'
+
+    def __init__(self, panel_rendered):
+        self.panel_rendered = panel_rendered
+
+    def get(self, url):
+        pass
+
+    def get_log(self, log_type):
+        return []
+
+    def execute_script(self, script, *args):
+        if script == PLACE_PANEL_RENDERED_SCRIPT:
+            return self.panel_rendered
+        return False  # No captcha
+
+    def find_element(self, by, value):
+        raise NoSuchElementException(value)
+
+
+class FakeElement:
+    def __init__(self, text):
+        self.text = text
+
+    def get_attribute(self, name):
+        return None
+
+
+class PlaceDriver(FakeDriver):
+    """
+    Driver whose place pages render a business name and nothing else
+
+    URLs in slow_urls time out (panel not rendered) on their first visit.
+    """
+
+    def __init__(self, slow_urls=()):
+        super().__init__(panel_rendered=True)
+        self.slow_urls = set(slow_urls)
+        self.visited = []
+
+    def get(self, url):
+        self.visited.append(url)
+
+    def _loading(self):
+        url = self.visited[-1]
+        return url in self.slow_urls and self.visited.count(url) == 1
+
+    def execute_script(self, script, *args):
+        if script == PLACE_PANEL_RENDERED_SCRIPT:
+            return not self._loading()
+        return False
+
+    def find_element(self, by, value):
+        if value == 'h1.DUwDvf' and not self._loading():
+            return FakeElement(f"Place {self.visited[-1]}")
+        raise NoSuchElementException(value)
+
+
+@pytest.fixture(autouse=True)
+def no_delays(monkeypatch):
+    monkeypatch.setattr(google_maps, 'random_delay', lambda *args, **kwargs: None)
+
+
+def make_scraper(driver, failure_tracker=None):
+    scraper = GoogleMapsScraper(driver, failure_tracker=failure_tracker or FailureTracker(max_retries=0))
+    scraper.wait = WebDriverWait(driver, 0.1)
+    return scraper
+
+
+@pytest.mark.parametrize('panel_rendered, kind', [(False, TIMEOUT), (True, PARSE_MISS)])
+def test_missing_name_is_timeout_until_panel_renders(panel_rendered, kind):
+    scraper = make_scraper(FakeDriver(panel_rendered))
+    assert scraper.try_extract('https://www.google.com/maps/place/x', 1, []) is None
+    assert scraper.failure_tracker.failures[kind] == 1
+    assert scraper.failure_tracker.given_up == [{'url': 'https://www.google.com/maps/place/x', 'kind': kind}]
+
+
+class DeadDriver(FakeDriver):
+    """Driver whose browser has crashed"""
+
+    def __init__(self):
+        super().__init__(panel_rendered=False)
+
+    def get(self, url):
+        raise InvalidSessionIdException('invalid session id')
+
+
+class CountingReviewScraper:
+    def __init__(self):
+        self.harvested = []
+
+    def set_driver(self, driver):
+        pass
+
+    def harvest(self, place_url, place_name=None):
+        self.harvested.append(place_url)
+
+
+def test_harvest_reviews_stops_a_dead_window():
+    review_scraper = CountingReviewScraper()
+    scraper = make_scraper(DeadDriver())
+    scraper.review_scraper = review_scraper
+    businesses = [{'name': f'Place {i}', 'google_maps_url': f'url-{i}'} for i in range(3)]
+
+    scraper.harvest_reviews(businesses)
+
+    assert scraper.dead
+    assert review_scraper.harvested == []
+    assert scraper.failure_tracker.failures[DRIVER_DEAD] == 1
+    # The place records are already extracted; only their reviews are missing
+    assert scraper.failure_tracker.given_up == []
+    assert [failed['url'] for failed in scraper.failure_tracker.review_failures] == ['url-0', 'url-1', 'url-2']
+    assert scraper.failure_tracker.summary()['review_failures'] == 3
+
+
+class FailingReviewScraper(CountingReviewScraper):
+    def __init__(self, error):
+        super().__init__()
+        self.error = error
+
+    def harvest(self, place_url, place_name=None):
+        raise self.error
+
+
+@pytest.mark.parametrize('error, kind', [
+    (TimeoutException('reviews pane did not load'), TIMEOUT),
+    (InvalidSessionIdException('invalid session id'), DRIVER_DEAD),
+])
+def test_failed_reviews_on_place_page_keep_the_record(error, kind):
+    scraper = make_scraper(PlaceDriver())
+    scraper.review_scraper = FailingReviewScraper(error)
+    scraper.circuit_breaker.consecutive_throttles = 1
+
+    business_data = scraper.try_extract('url-0', 1, [])
+
+    assert business_data['name'] == 'Place url-0'
+    assert scraper.failure_tracker.failures[kind] == 1
+    assert scraper.failure_tracker.review_failures == [{'url': 'url-0', 'kind': kind}]
+    assert scraper.failure_tracker.given_up == []
+    # Not a success: the throttle streak is kept
+    assert scraper.circuit_breaker.consecutive_throttles == 1
+    # handle_failure ran: a dead browser without a browser manager cannot be replaced
+    assert scraper.dead == (kind == DRIVER_DEAD)
+
+
+def test_throttled_reviews_feed_the_circuit_breaker():
+    scraper = make_scraper(PlaceDriver())
+    scraper.review_scraper = FailingReviewScraper(ExtractionError(THROTTLED))
+    scraper.try_extract('url-0', 1, [])
+    assert scraper.circuit_breaker.consecutive_throttles == 1
+
+
+def test_harvested_reviews_reset_the_circuit_breaker():
+    scraper = make_scraper(PlaceDriver())
+    scraper.review_scraper = CountingReviewScraper()
+    scraper.circuit_breaker.consecutive_throttles = 2
+    assert scraper.try_extract('url-0', 1, [])['name'] == 'Place url-0'
+    assert scraper.review_scraper.harvested == ['url-0']
+    assert scraper.circuit_breaker.consecutive_throttles == 0
+
+
+@pytest.mark.parametrize('error, kind', [
+    (ExtractionError(THROTTLED), THROTTLED),
+    (ExtractionError(PARSE_MISS, 'No business name'), PARSE_MISS),
+    (TimeoutException('page load'), TIMEOUT),
+    (InvalidSessionIdException('invalid session id'), DRIVER_DEAD),
+    (NoSuchWindowException('no such window'), DRIVER_DEAD),
+    (ConnectionRefusedError(111, 'Connection refused'), DRIVER_DEAD),
+    (WebDriverException('chrome not reachable'), DRIVER_DEAD),
+    (WebDriverException('unknown error: session deleted because of page crash'), DRIVER_DEAD),
+    (WebDriverException('tab crashed'), DRIVER_DEAD),
+    (WebDriverException('timeout: Timed out receiving message from renderer'), TIMEOUT),
+    (WebDriverException('unknown error: net::ERR_NAME_NOT_RESOLVED'), ERROR),
+    (WebDriverException(), ERROR),
+    (urllib3.exceptions.ProtocolError('Connection aborted.'), DRIVER_DEAD),
+    (urllib3.exceptions.MaxRetryError(None, 'http://localhost:9515/session'), DRIVER_DEAD),
+    (ValueError('bad value'), ERROR),
+])
+def test_classify_failure(error, kind):
+    assert classify_failure(error) == kind
+
+
+def test_try_retry_caps_attempts_per_url():
+    tracker = FailureTracker(max_retries=10, max_attempts=3)
+    assert tracker.try_retry(1)
+    assert tracker.try_retry(2)
+    assert not tracker.try_retry(3)
+    assert tracker.retries == 2
+
+
+def test_try_retry_shares_run_budget():
+    tracker = FailureTracker(max_retries=2, max_attempts=3)
+    assert tracker.try_retry(1)
+    assert tracker.try_retry(1)
+    assert not tracker.try_retry(1)
+    assert tracker.retries == 2
+
+
+def test_circuit_breaker_opens_at_threshold():
+    breaker = CircuitBreaker(threshold=3, pause_seconds=0)
+    assert not breaker.record(TIMEOUT)  # Only throttling counts
+    assert not breaker.record(THROTTLED)
+    assert not breaker.record(THROTTLED)
+    assert breaker.record(THROTTLED)
+    breaker.reset()
+    assert not breaker.record(THROTTLED)
+
+
+def test_open_circuit_breaker_counts_a_trip():
+    scraper = make_scraper(FakeDriver(panel_rendered=True))
+    scraper.circuit_breaker = CircuitBreaker(threshold=2, pause_seconds=0)
+    scraper.handle_failure(THROTTLED)
+    assert scraper.failure_tracker.circuit_trips == 0
+    scraper.handle_failure(THROTTLED)
+    assert scraper.failure_tracker.circuit_trips == 1
+    # Without a browser manager the window cannot recycle; the breaker closes again
+    assert scraper.circuit_breaker.consecutive_throttles == 0
+
+
+def test_extract_businesses_recovers_from_retry_queue(monkeypatch):
+    monkeypatch.setattr(google_maps, 'backoff_delay', lambda attempt: 0)
+    driver = PlaceDriver(slow_urls=['url-1'])
+    scraper = make_scraper(driver, FailureTracker(max_retries=5))
+
+    results = scraper.extract_businesses(['url-0', 'url-1', 'url-2'], 'güzellik salonu', 'İstanbul')
+
+    assert [business['name'] for business in results] == ['Place url-0', 'Place url-2', 'Place url-1']
+    assert driver.visited == ['url-0', 'url-1', 'url-2', 'url-1']
+    assert results[-1]['search_city'] == 'İstanbul'
+    tracker = scraper.failure_tracker
+    assert (tracker.failures[TIMEOUT], tracker.retries, tracker.recovered) == (1, 1, 1)
+    assert tracker.given_up == []
+
+
+def test_dead_window_hands_links_to_live_windows():
+    tracker = FailureTracker(max_retries=0)
+    dead = make_scraper(DeadDriver(), tracker)
+    live = make_scraper(PlaceDriver(), tracker)
+    live.window_index = 1
+
+    assert dead.extract_businesses(['url-0', 'url-1'], 'güzellik salonu', 'İstanbul') == []
+    assert dead.dead and dead.unprocessed == ['url-0', 'url-1']
+
+    app = GoogleMapsScraperApp(num_windows=2)
+    results = app._take_over_dead_windows([dead, live], tracker, 'güzellik salonu', 'İstanbul', None)
+
+    assert [business['name'] for business in results] == ['Place url-0', 'Place url-1']
+    assert dead.unprocessed == [] and live.unprocessed == []
+    assert tracker.given_up == []
+
+
+def test_links_are_given_up_when_every_window_is_dead():
+    tracker = FailureTracker(max_retries=0)
+    dead = make_scraper(DeadDriver(), tracker)
+    dead.extract_businesses(['url-0', 'url-1'], 'güzellik salonu', 'İstanbul')
+
+    app = GoogleMapsScraperApp(num_windows=1)
+    assert app._take_over_dead_windows([dead], tracker, 'güzellik salonu', 'İstanbul', None) == []
+    assert tracker.given_up == [{'url': 'url-0', 'kind': DRIVER_DEAD}, {'url': 'url-1', 'kind': DRIVER_DEAD}]
@@ -0,0 +1,107 @@
+"""
+Review harvest stop conditions, with a stand-in driver serving review batches
+"""
+from datetime import datetime, timedelta
+import pytest
+import scraper_modules.reviews as reviews
+from scraper_modules.reviews import ReviewScraper, COLLECT_REVIEWS_SCRIPT
+from scraper_modules.google_maps import GoogleMapsScraper
+
+
+class FakeDriver:
+    """Serves one batch of reviews per collect call, then nothing"""
+
+    def __init__(self, batches):
+        # The harvest annotates reviews in place; keep BATCHES untouched
+        self.batches = [[dict(review) for review in batch] for batch in batches]
+        self.log_reads = 0
+
+    def execute_script(self, script, *args):
+        if script == COLLECT_REVIEWS_SCRIPT:
+            return self.batches.pop(0) if self.batches else []
+        return None
+
+    def get_log(self, log_type):
+        self.log_reads += 1
+        return []
+
+    def execute_cdp_cmd(self, command, params):
+        raise RuntimeError('no CDP')
+
+
+class ListSink:
+    def __init__(self):
+        self.reviews = []
+
+    def write(self, review):
+        self.reviews.append(review)
+
+
+def review(review_id, date):
+    return {'review_id': review_id, 'author': 'A', 'rating': '5', 'date': date, 'text': ''}
+
+
+# Relevance order: an old review first, newer ones further down
+BATCHES = [
+    [review('r1', '2 yıl önce'), review('r2', '3 gün önce')],
+    [review('r3', '1 hafta önce'), review('r4', '3 yıl önce')],
+]
+
+
+@pytest.fixture(autouse=True)
+def no_waits(monkeypatch):
+    monkeypatch.setattr(reviews, 'REVIEW_SCROLL_PAUSE_TIME', 0)
+
+
+def make_scraper(monkeypatch, sorted_by_date, **kwargs):
+    scraper = ReviewScraper(FakeDriver(BATCHES), ListSink(), **kwargs)
+    monkeypatch.setattr(scraper, 'open_reviews_pane', lambda: True)
+    monkeypatch.setattr(scraper, 'sort_by_newest', lambda: sorted_by_date)
+    return scraper
+
+
+def harvest(monkeypatch, sorted_by_date, **kwargs):
+    kwargs.setdefault('since', datetime.now() - timedelta(days=30))
+    scraper = make_scraper(monkeypatch, sorted_by_date, **kwargs)
+    stats = scraper.harvest('url', 'Place')
+    return stats, [r['review_id'] for r in scraper.sink.reviews]
+
+
+def test_cutoff_stops_when_sorted_by_date(monkeypatch):
+    stats, harvested = harvest(monkeypatch, sorted_by_date=True)
+    assert stats['stop_reason'] == 'cutoff'
+    assert harvested == []
+
+
+def test_since_filters_when_sort_fails(monkeypatch):
+    stats, harvested = harvest(monkeypatch, sorted_by_date=False)
+    assert stats['stop_reason'] == 'exhausted'
+    assert harvested == ['r2', 'r3']
+
+
+def test_cap_stops_the_harvest(monkeypatch):
+    stats, harvested = harvest(monkeypatch, sorted_by_date=False, since=None, max_reviews=3)
+    assert stats['stop_reason'] == 'cap'
+    assert harvested == ['r1', 'r2', 'r3']
+
+
+def test_performance_log_is_drained_every_batch(monkeypatch):
+    scraper = make_scraper(monkeypatch, sorted_by_date=False)
+    scraper.harvest('url', 'Place')
+    # Two batches, then three empty collects before giving up
+    assert scraper.driver.log_reads == 5
+
+
+def test_poll_callback_replaces_draining(monkeypatch):
+    polls = []
+    scraper = make_scraper(monkeypatch, sorted_by_date=False, poll=lambda: polls.append(1))
+    scraper.harvest('url', 'Place')
+    assert len(polls) == 5
+    assert scraper.driver.log_reads == 0
+
+
+def test_place_scraper_counts_drained_traffic():
+    driver = FakeDriver(BATCHES)
+    scraper = ReviewScraper(driver, ListSink())
+    place_scraper = GoogleMapsScraper(driver, review_scraper=scraper)
+    assert scraper.poll == place_scraper.collect_network_stats